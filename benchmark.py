@@ -0,0 +1,126 @@
+import sys, os
+import argparse
+import json
+import time
+import tempfile
+import tracemalloc
+import multiprocessing
+import resource
+
+# Throughput and memory of the processing stages on the synthetic files of
+# fixtures.py, at the event sizes of fixtures.SIZES:
+#   writer : Writer.Write of the whole file, with the ReadTracks, ReadEnergyDepo,
+#            FillEnergyInfo and Fill stages timed by Event(..., profile=True)
+#   neutron: Event.NeutronDirections over the whole file
+# Each measurement runs in its own process, after one warm-up entry compiling
+# the C++ helpers, so that its peak memory is its own.
+
+BENCHMARKS = ['writer', 'neutron']
+
+# ------------------------
+def MakeFixture(task):
+    # one worker: writes the fixture outside of the measured processes
+    import fixtures
+    directory, size, nEvents, seed = task
+    return fixtures.Fixture(directory, size, nEvents, seed)
+
+# ------------------------
+def PeakRSS():
+    # peak resident memory of this process [MB], ru_maxrss is in kB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+# ------------------------
+def RunBenchmark(task):
+    # one worker: one benchmark on one fixture
+    name, size, fileName = task
+    import ROOT
+    ROOT.gROOT.SetBatch(True)
+    from event import Event
+    from writer import Writer
+
+    warmup = Event(fileName, 'Marley')
+    warmup.Jump(0)
+    warmup.info
+    warmup.NeutronDirections(0, 1)
+    del warmup
+
+    baseline = PeakRSS()
+    tracemalloc.start()
+    event = Event(fileName, 'Marley', profile=True)
+    start = time.perf_counter()
+    if name == 'writer':
+        with tempfile.TemporaryDirectory() as tmp:
+            w = Writer(event, os.path.join(tmp, 'bench.root'))
+            w.Write()
+            w.Close()
+    elif name == 'neutron':
+        event.NeutronDirections()
+    seconds = time.perf_counter() - start
+    event.EndProfiledEvent()
+    pyPeak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    report = event.profiler.Report()
+    return {
+        'benchmark': name, 'size': size, 'events': event.nEntry,
+        'tracks_per_event': report['counts']['tracks']['total'] / max(event.nEntry, 1),
+        'segments_per_event': report['counts']['segments']['total'] / max(event.nEntry, 1),
+        'seconds': seconds, 'events_per_second': event.nEntry / seconds,
+        'stages': {stage: {'seconds': s['seconds'], 'events_per_second': s['events'] / s['seconds'] if s['seconds'] > 0 else 0.}
+                   for stage, s in report['stages'].items()},
+        'peak_rss_mb': PeakRSS(), 'baseline_rss_mb': baseline, 'peak_python_mb': pyPeak,
+    }
+
+# ------------------------
+def RunAll(sizes, benchmarks, nEvents, directory, seed=0):
+    # one fresh spawned process per fixture and per measurement
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        files = {size: pool.apply(MakeFixture, ((directory, size, nEvents, seed),)) for size in sizes}
+        return [pool.apply(RunBenchmark, ((name, size, files[size]),)) for size in sizes for name in benchmarks]
+
+# ------------------------
+def Stages(results):
+    # the stages the profiler recorded in any of the results, slowest first as in its report
+    seconds = {}
+    for r in results:
+        for stage, s in r['stages'].items():
+            seconds[stage] = seconds.get(stage, 0.) + s['seconds']
+    return sorted(seconds, key=lambda stage: -seconds[stage])
+
+# ------------------------
+def PrintResults(results):
+    stages = Stages(results)
+    header = f"{'benchmark':<9} {'size':<7} {'trk/evt':>8} {'seg/evt':>8} {'evt/s':>9}"
+    widths = [max(15, len(stage)) for stage in stages]
+    header += ''.join(f' {stage:>{width}}' for stage, width in zip(stages, widths))
+    header += f" {'RSS MB':>8} {'py MB':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        line = f"{r['benchmark']:<9} {r['size']:<7} {r['tracks_per_event']:>8.0f} {r['segments_per_event']:>8.0f} {r['events_per_second']:>9.1f}"
+        for stage, width in zip(stages, widths):
+            rate = r['stages'].get(stage, {}).get('events_per_second')
+            line += f' {rate:>{width}.1f}' if rate is not None else f" {'-':>{width}}"
+        line += f" {r['peak_rss_mb']:>8.0f} {r['peak_python_mb']:>7.1f}"
+        print(line)
+    print("stage columns: events/s of the stage alone; RSS: peak of the process, py: peak of python allocations")
+
+if __name__ == "__main__":
+    from fixtures import SIZES
+    parser = argparse.ArgumentParser(description='Benchmark Event and Writer on synthetic edep-sim files')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES), help='event sizes')
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=BENCHMARKS, help='what to time')
+    parser.add_argument('--events', '-n', type=int, default=100, help='events per fixture')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the fixtures')
+    parser.add_argument('--fixtures', metavar='DIR', default=os.path.join(tempfile.gettempdir(), 'edep_bench'),
+                        help='directory of the fixtures, written if missing')
+    parser.add_argument('--json', metavar='FILE', default=None, help='also write the results to FILE')
+    args = parser.parse_args()
+
+    results = RunAll(args.sizes, args.benchmarks, args.events, args.fixtures, args.seed)
+    PrintResults(results)
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
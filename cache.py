@@ -0,0 +1,164 @@
+import os, hashlib, json, fcntl
+import numpy as np
+from schema import QUANTITY_GROUPS, ProducerGroup
+
+# Disk cache of the quantities derived from each entry, so that another pass
+# over the same files doesn't go back to the edep-sim trees.
+# One directory per input file, keyed by its absolute path and mtime, holding
+# for each quantity group and hash of the configuration the group depends on:
+#   info_<group>_<hash>.npy         : (n_entries,) records of the info fields of the
+#                                     group, memory mapped, plus
+#                                       infoFilled, tracksFilled : entry is cached
+#                                       trackStart, nTrack       : its rows in the .bin
+#   tracks_<group>_<hash>.bin       : per-track rows of the group, appended entry by entry
+#   tracks_<group>_<hash>.dtype.npy : empty array with the dtype of these rows
+# A configuration change only invalidates the groups whose hash changes.
+# The groups of ENTRY_SEEDED are random with a seed per chain entry, so their
+# hash also holds the chain entry of the first entry of the file: the same file
+# at another place in a chain doesn't reuse them.
+
+CACHE_VERSION = 1 # bump when the way quantities are derived changes
+
+ENTRY_SEEDED = ['light'] # see LightSmearing.Generator
+
+# ------------------------
+def ConfigHash(config):
+    text = json.dumps(dict(config, version=CACHE_VERSION), sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+class EventCache:
+
+    def __init__(self, cacheDir, event):
+        self.cacheDir = cacheDir
+        self.files, self.offsets = event.ChainFiles()
+        # per file of the chain: {group: hash}
+        configs = event.CacheConfig()
+        self.hashes = [{group: ConfigHash(dict(config, chainOffset=int(offset)) if group in ENTRY_SEEDED else config)
+                        for group, config in configs.items()} for offset in self.offsets[:-1]]
+        # info fields of each group, in double precision as in the event record
+        self.infoFields = {}
+        self.infoDtypes = {}
+        for group in QUANTITY_GROUPS:
+            fields = [obs for obs in event.schema if ProducerGroup(obs.producer) == group]
+            self.infoFields[group] = [obs.name for obs in fields]
+            self.infoDtypes[group] = np.dtype(
+                [(obs.name, 'f8' if obs.dtype == 'f4' else obs.dtype, obs.shape) for obs in fields]
+                + [('infoFilled', 'u1'), ('tracksFilled', 'u1'), ('trackStart', 'i8'), ('nTrack', 'i4')])
+        self.dirs = [self.FileDir(f) for f in self.files]
+        self.infoMaps = {}  # (file index, group): memory mapped info records
+        self.trackMaps = {} # (file index, group): memory mapped track rows
+
+    # ------------------------
+    def FileDir(self, fileName):
+        # None if the file has no mtime (e.g. remote): its entries are not cached
+        path = os.path.abspath(fileName)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        key = hashlib.sha1(f'{path}:{mtime}'.encode()).hexdigest()[:16]
+        return os.path.join(self.cacheDir, os.path.basename(path) + '.' + key)
+
+    # ------------------------
+    def Locate(self, entry):
+        # (file index, entry in the file) of a chain entry
+        i = int(np.searchsorted(self.offsets, entry, side='right')) - 1
+        return i, entry - int(self.offsets[i])
+
+    # ------------------------
+    def Path(self, i, kind, group, ext):
+        return os.path.join(self.dirs[i], f'{kind}_{group}_{self.hashes[i][group]}{ext}')
+
+    # ------------------------
+    def Info(self, i, group, create=False):
+        key = (i, group)
+        if key not in self.infoMaps:
+            if self.dirs[i] is None:
+                return None
+            path = self.Path(i, 'info', group, '.npy')
+            if not os.path.exists(path):
+                if not create:
+                    return None
+                # written aside and linked in place: the link fails if a
+                # concurrent writer was first, and then its file is used
+                os.makedirs(self.dirs[i], exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                n = int(self.offsets[i+1] - self.offsets[i])
+                np.lib.format.open_memmap(tmp, mode='w+', dtype=self.infoDtypes[group], shape=(n,)).flush()
+                try:
+                    os.link(tmp, path)
+                except FileExistsError:
+                    pass
+                finally:
+                    os.remove(tmp)
+            self.infoMaps[key] = np.load(path, mmap_mode='r+')
+        return self.infoMaps[key]
+
+    # ------------------------
+    def LoadInfo(self, entry, info):
+        # copies the cached fields into info, True if every group is cached
+        i, j = self.Locate(entry)
+        records = []
+        for group in QUANTITY_GROUPS:
+            records.append(self.Info(i, group))
+            if records[-1] is None or not records[-1][j]['infoFilled']:
+                return False
+        for group, record in zip(QUANTITY_GROUPS, records):
+            for name in self.infoFields[group]:
+                info[name] = record[j][name]
+        return True
+
+    # ------------------------
+    def StoreInfo(self, entry, info):
+        i, j = self.Locate(entry)
+        for group in QUANTITY_GROUPS:
+            record = self.Info(i, group, create=True)
+            if record is None or record[j]['infoFilled']:
+                continue
+            for name in self.infoFields[group]:
+                record[name][j] = info[name]
+            record['infoFilled'][j] = 1
+
+    # ------------------------
+    def HasTracks(self, entry, group):
+        i, j = self.Locate(entry)
+        record = self.Info(i, group)
+        return record is not None and bool(record[j]['tracksFilled'])
+
+    # ------------------------
+    def LoadTracks(self, entry, group):
+        # the cached track rows of the group, None if not cached
+        i, j = self.Locate(entry)
+        record = self.Info(i, group)
+        if record is None or not record[j]['tracksFilled']:
+            return None
+        start, n = int(record[j]['trackStart']), int(record[j]['nTrack'])
+        dtype = np.load(self.Path(i, 'tracks', group, '.dtype.npy')).dtype if n == 0 else None
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        rows = self.trackMaps.get((i, group))
+        if rows is None or rows.size < start + n:
+            dtype = np.load(self.Path(i, 'tracks', group, '.dtype.npy')).dtype
+            rows = np.memmap(self.Path(i, 'tracks', group, '.bin'), dtype=dtype, mode='r')
+            self.trackMaps[(i, group)] = rows
+        return rows[start:start+n]
+
+    # ------------------------
+    def StoreTracks(self, entry, group, rows):
+        i, j = self.Locate(entry)
+        record = self.Info(i, group, create=True)
+        if record is None or record[j]['tracksFilled']:
+            return
+        dtypePath = self.Path(i, 'tracks', group, '.dtype.npy')
+        if not os.path.exists(dtypePath):
+            np.save(dtypePath, np.zeros(0, dtype=rows.dtype))
+        with open(self.Path(i, 'tracks', group, '.bin'), 'ab') as f:
+            # appends from other processes go one at a time
+            fcntl.flock(f, fcntl.LOCK_EX)
+            start = f.seek(0, os.SEEK_END) // rows.dtype.itemsize
+            f.write(rows.tobytes())
+            f.flush()
+            fcntl.flock(f, fcntl.LOCK_UN)
+        record['trackStart'][j] = start
+        record['nTrack'][j] = rows.size
+        record['tracksFilled'][j] = 1
@@ -0,0 +1,34 @@
+import numpy as np
+
+# Particle categories used by the *List branches:
+#   0: mu/e; 1: proton; 2: neutron; 3: pi+/-; 4: pi0; 5: gamma; 6: alpha; 7: others
+CATEGORIES = ['lepton', 'proton', 'neutron', 'pi+-', 'pi0', 'gamma', 'alpha', 'others']
+N_CATEGORIES = len(CATEGORIES)
+PDG_CATEGORY = {
+    13: 0, -13: 0, 11: 0, -11: 0,
+    2212: 1,
+    2112: 2,
+    211: 3, -211: 3,
+    111: 4,
+    22: 5,
+    1000020040: 6,
+}
+# categories whose available energy includes the mass (mesons and leptons)
+MASS_INCLUDED = np.array([True, False, False, True, True, True, False, False])
+
+_pdgKeys = np.array(sorted(PDG_CATEGORY))
+_pdgValues = np.array([PDG_CATEGORY[pdg] for pdg in _pdgKeys])
+
+# ------------------------
+def Category(pdg):
+    # category index of each pdg code, 7 (others) if not in the table
+    pdg = np.asarray(pdg)
+    i = np.clip(np.searchsorted(_pdgKeys, pdg), 0, _pdgKeys.size-1)
+    return np.where(_pdgKeys[i] == pdg, _pdgValues[i], N_CATEGORIES-1)
+
+# ------------------------
+def SumByCategory(category, values):
+    # values: (n, n_observables) per particle -> (N_CATEGORIES, n_observables)
+    result = np.zeros((N_CATEGORIES,) + values.shape[1:])
+    np.add.at(result, category, values)
+    return result
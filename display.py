@@ -0,0 +1,138 @@
+import sys, os
+import argparse
+import multiprocessing
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+
+# Event displays of Plotter.Draw on a figure reused from event to event: the
+# axes, scatters, colorbar and labels are created once and only their data is
+# updated. RenderParallel spreads the entries of a scan over worker processes,
+# each drawing off screen with its own renderers.
+
+# (xlim, ylim, xpos, ypos, interval) of the panels and of the particle labels
+FRAMES = {
+    'Genie' : ((-2, 8), (-4, 4), -1.8, 3.6, 0.35),
+    # Normally Marley use (-1, 1.5), (-1, 1.5), interval 0.1
+    # Debug neutron depo: (-200, 200), (-200, 200), -195, 190, 16
+    # n-capture scale: (-0.5, 0.5), (-0.5, 0.5), -0.45, 0.4
+    'Marley': ((-1, 0.5), (-1, 1), -0.95, 0.9, 0.1),
+}
+
+# the four displays of test.py: (axis, value)
+VIEWS = [('xz', 'time'), ('xz', 'charge'), ('yz', 'time'), ('yz', 'charge')]
+
+MAX_LABELS = 20 # particle labels drawn at most
+
+class DisplayRenderer:
+    # one figure for the displays of a given value ('time' or 'charge') and energy scale
+
+    def __init__(self, evgen, value='time', energy='GeV', markerSize=3, cmap='jet', vmax=2000):
+        if evgen not in FRAMES:
+            print("Unknown event generator!")
+            sys.exit()
+        xlim, ylim, xpos, ypos, interval = FRAMES[evgen]
+        self.value = value
+        self.energy = energy
+        self.fig = Figure(figsize=(5*2, 4), dpi=100)
+        FigureCanvasAgg(self.fig)
+        self.ax1, self.ax2 = self.fig.subplots(1, 2)
+        self.title = self.fig.suptitle('')
+        cb_ax = self.fig.add_axes([.94,.124,.02,.754])
+
+        # particle plot
+        self.particles = self.ax1.scatter([], [], s=markerSize)
+        if value == 'time':
+            # timing plot
+            self.values = self.ax2.scatter([], [], c=[], cmap=cmap, norm=LogNorm(vmin=1, vmax=vmax), s=markerSize)
+            cb_ax.set_xlabel('ns')
+        elif value == 'charge':
+            # charge plot
+            self.vmax = 4 if energy == 'GeV' else 2.5
+            self.values = self.ax2.scatter([], [], c=[], cmap=cmap, vmin=0, vmax=self.vmax, s=markerSize)
+            cb_ax.set_xlabel('MeV/cm')
+        self.fig.colorbar(self.values, orientation='vertical', cax=cb_ax)
+
+        for ax in (self.ax1, self.ax2):
+            ax.set_xlim(*xlim)
+            ax.set_ylim(*ylim)
+            ax.tick_params(axis='y', direction='in', length=2)
+            ax.tick_params(axis='x', direction='in', length=2)
+        self.labels = [self.ax1.text(xpos, ypos - k*interval, '', visible=False) for k in range(MAX_LABELS)]
+
+    # ------------------------
+    def Render(self, plotter, axis, fileName):
+        # draws the depos collected by plotter, projected on axis (e.g. 'yz'), into fileName
+        mapping = {'x': plotter.xx, 'y': plotter.yy, 'z': plotter.zz}
+        offsets = np.column_stack([mapping[axis[1]], mapping[axis[0]]])
+        self.title.set_text(plotter.event.vertex.GetReaction())
+        self.particles.set_offsets(offsets)
+        self.particles.set_facecolors(plotter.cc)
+        self.values.set_offsets(offsets)
+        if self.value == 'time':
+            self.values.set_array(plotter.tt)
+        else:
+            # as with vmax only: the color scale starts at the smallest value
+            self.values.set_array(plotter.ee*2)
+            self.values.set_clim(min(plotter.ee.min()*2, self.vmax) if plotter.ee.size else 0, self.vmax)
+        self.ax1.set_ylabel(f'{axis[0]} [m]')
+        for ax in (self.ax1, self.ax2):
+            ax.set_xlabel(f'{axis[1]} [m]')
+
+        labels = plotter.ParticleLabels()
+        for k, text in enumerate(self.labels):
+            if k < len(labels):
+                text.set_text(labels[k][0])
+                text.set_color(labels[k][1])
+            text.set_visible(k < len(labels))
+        self.fig.savefig(fileName)
+
+# ------------------------
+def DisplayFileName(plotpath, axis, value, energy, entry):
+    return plotpath + '/particle_%s_%s_%s_evt_%d.pdf' % (value, axis, energy, entry)
+
+# ------------------------
+def RenderRange(task):
+    # one worker: the displays of its entries, files written in event.plotpath
+    fileName, evgen, entries, views, energy, dQthreshold = task
+    from event import Event
+    from plotter import Plotter
+    event = Event(fileName, evgen, collections=['primaries', 'trajectories', 'SimEnergyDeposit'])
+    plotter = Plotter(event)
+    renderers = {}
+    files = []
+    for entry in entries:
+        plotter.Jump(int(entry), dQthreshold)
+        for axis, value in views:
+            if value not in renderers:
+                renderers[value] = DisplayRenderer(evgen, value, energy)
+            files.append(DisplayFileName(event.plotpath, axis, value, energy, int(entry)))
+            renderers[value].Render(plotter, axis, files[-1])
+    return files
+
+# ------------------------
+def RenderParallel(fileName, evgen, entries, jobs, views=VIEWS, energy='MeV', dQthreshold=0):
+    # split the entries into one contiguous slice per worker; returns the files written
+    slices = [s for s in np.array_split(np.asarray(entries, dtype=int), jobs) if s.size]
+    tasks = [(fileName, evgen, s, views, energy, dQthreshold) for s in slices]
+    if len(tasks) <= 1:
+        return sum(map(RenderRange, tasks), [])
+    # spawn: every worker starts its own ROOT instead of inheriting a forked one
+    with multiprocessing.get_context('spawn').Pool(len(tasks)) as pool:
+        return sum(pool.map(RenderRange, tasks), [])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Draw the event displays of a range of entries')
+    parser.add_argument('input', help='input edep-sim file(s), wildcards allowed')
+    parser.add_argument('evgen', choices=['Genie', 'Marley'], help='event generator')
+    parser.add_argument('start', type=int, help='first entry')
+    parser.add_argument('stop', type=int, help='entry after the last one')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--energy', choices=['GeV', 'MeV'], default='MeV', help='charge color scale')
+    parser.add_argument('--threshold', type=float, default=0, help='dQ threshold of the depos drawn [MeV]')
+    args = parser.parse_args()
+
+    files = RenderParallel(args.input, args.evgen, range(args.start, args.stop), args.jobs,
+                           energy=args.energy, dQthreshold=args.threshold)
+    print(f"{len(files)} displays written")
@@ -5,16 +5,76 @@ from ROOT import TG4Event, TFile, TChain
 
 import sys, os
 import numpy as np
-import random
-import math
+from segments import ReadSegments
+from light import LightSmearing, LightLabel, LIGHT_YIELDS, W_PH
+from tracks import TrackTable, SubtreeSums
+from categories import Category, SumByCategory, MASS_INCLUDED, N_CATEGORIES, PDG_CATEGORY
+from schema import BuildSchema, EventDtype, CHARGE_THRESHOLDS, QUANTITY_GROUPS, QuantityGroup
+from cache import EventCache
+from stream import EventView, EventBatch, Prefetcher
+from neutron import NeutronLineage, DirectionRecords, CAPTURE_DTYPE
+from profiling import StageTimer
+
+# sub-collections of TG4Event that can be left unread, and the branches of the
+# (split) Event branch holding them; the order matters, points after trajectories
+COLLECTIONS = {
+    'primaries'    : ['*Primaries*'],
+    'trajectories' : ['*Trajectories*'],
+    'points'       : ['*Trajectories.Points*'],
+    'segments'     : ['*SegmentDetectors*'],
+}
+
+# recombination @500V/cm, see ChargeBirksLaw and ChargeModifiedBoxModel
+BIRKS = {'A': 0.8, 'kQ': 0.0972}  # kQ in g/(MeV*cm2)
+MBOX = {'A': 0.930, 'B': 0.424}   # B in g/(MeV*cm2)
+LAR_DENSITY = 1.4                 # g/cm^3
+IONIZATION_RATIO = 0.83           # excitation and ionization ratio (0.83 vs 0.17)
+
+# per-track columns cached with the 'depo' group, next to its sums
+TRACK_COLUMNS = ['trkId', 'parentId', 'pdg', 'momentum', 'selfLength']
 
 class Event:
 
-    def __init__(self, fileName, evgen='Genie'):
+    def __init__(self, fileName, evgen='Genie', lightYields=LIGHT_YIELDS, seed=0, thresholds=CHARGE_THRESHOLDS,
+                 collections=None, cacheDir=None, scanThresholds=None, scanLengthCuts=None, profile=False):
         print("event: initilization")
         self.fileName = fileName
         self.evgen = evgen
+        # what is read from the EDepSimEvents tree: None for everything, or some of
+        # COLLECTIONS and/or segment detector names, e.g. ['trajectories', 'SimEnergyDeposit']
+        self.collections = collections
+        # light yields [PE/MeV] to simulate, smeared with a per-entry seed
+        self.light = LightSmearing(lightYields, seed)
+        # dQ thresholds [MeV] on single depos
+        self.thresholds = dict(thresholds)
+        # optional scans, written as (n_scan, N_CATEGORIES) *_scan observables:
+        # dQ thresholds [MeV] and track/blip length cuts [cm] (2 cm otherwise)
+        self.scanThresholds = np.array(scanThresholds if scanThresholds is not None else [], dtype=float)
+        self.scanLengthCuts = np.array(scanLengthCuts if scanLengthCuts is not None else [], dtype=float)
+        # per-event record with one field per observable, reused by every Jump
+        self.schema = BuildSchema(self.light.lightYields, self.thresholds, self.scanThresholds, self.scanLengthCuts)
+        self._info = np.zeros((), dtype=EventDtype(self.schema))
+        self.InitCategoryProducers()
+        # observable groups, computed on first access after each Jump (see Require)
+        self.groups = {
+            'vertex'      : self.ReadVertex,
+            'trajectories': self.ReadTrajectories,
+            'tracks'      : self.ReadTracks,     # track table and ancestry
+            'depo'        : self.ReadEnergyDepo, # segments, energy and length per track
+            'charge'      : self.FillCharge,     # Birks charge and its thresholds
+            'charge_MBox' : self.FillChargeMBox, # Modified Box charge and its thresholds
+            'light'       : self.FillLight,      # smeared light, all light yields
+            'info'        : self.FillInfo,       # the per-event record of the schema
+            'neutron'     : self.ReadNeutron,    # tracks descending from a primary neutron
+        }
+        self.computed = set()
+        self.entryLoaded = False
+        # per-stage timing, see SaveProfile
+        self.profiler = StageTimer() if profile else None
+        self.profileClosed = True
         self.ReadTree()
+        # derived quantities cached on disk per input file and configuration, if cacheDir is set
+        self.cache = EventCache(cacheDir, self) if cacheDir is not None else None
 
         self.currentEntry = 0
         # create a folder to store plots
@@ -44,23 +104,53 @@ class Event:
             sys.exit()
 
         self.event = TG4Event()
+        self.treeEvent = self.event
         self.simTree.SetBranchAddress("Event", self.event)
+        self.SetCollections(self.collections)
 
+    # ------------------------
+    def SetCollections(self, collections=None):
+        # disable the branches of the collections that are not needed, so GetEntry
+        # doesn't read and decompress them
+        # the SegmentDetectors map is a single branch: it is read as a whole as soon
+        # as one detector is asked for. Takes effect from the next Jump.
+        if collections is None:
+            self.readCollections = set(COLLECTIONS)
+            self.detectors = None # all
+        else:
+            names = set(collections)
+            self.detectors = names - set(COLLECTIONS)
+            self.readCollections = names & set(COLLECTIONS)
+            if self.detectors:
+                self.readCollections.add('segments')
+            if 'points' in names:
+                self.readCollections.add('trajectories')
+        self.collections = collections
+        self.branchStatus = [(pattern, name in self.readCollections)
+                             for name, patterns in COLLECTIONS.items() for pattern in patterns]
+        for pattern, status in self.branchStatus:
+            self.simTree.SetBranchStatus(pattern, status)
 
-        self.event = TG4Event()
-        self.simTree.SetBranchAddress("Event", self.event)
+    # ------------------------
+    def CheckCollection(self, name, detName=None):
+        if name not in self.readCollections or (detName is not None and self.detectors and detName not in self.detectors):
+            print(f"{detName or name} is not read from the EDepSimEvents tree, add it to the Event collections!")
+            sys.exit()
 
     # ------------------------
     def Jump(self, entryNo):
+        if self.profiler is not None:
+            self.EndProfiledEvent()
         if entryNo%100 == 0:
-            print(f'reading event {entryNo}/{self.nEntry}')
+            rate = f', {self.profiler.Rate():.1f} events/s' if self.profiler is not None else ''
+            print(f'reading event {entryNo}/{self.nEntry}{rate}')
 
         self.currentEntry = entryNo
-        self.simTree.GetEntry(entryNo)
-         
-        self.ReadVertex()
-        self.ReadTracks()
-        self.ReadEnergyDepo('SimEnergyDeposit')
+        # the entry is read, and everything else computed, when first asked for
+        self.event = self.treeEvent
+        self.entryLoaded = False
+        self.computed = set()
+        self.profileClosed = False
         #self.PrintVertex
         #self.PrintTracksEnergy()
         #self.PrintTracksEnergy_ignoreneutron
@@ -68,58 +158,141 @@ class Event:
         #self.PrintTracks
         #self.read_neutron_direction
 
-        self.info = {}
-        self.info['Event_ID'] = self.currentEntry
-        self.info['E_nu'] = 0
-        self.info['E_avail'] = 0
-        self.info['E_availList'] = np.zeros(8) # lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.info['E_depoTotal'] = 0
-        self.info['E_depoTotal_track'] = 0
-        self.info['Q_depoTotal_dots_th_75keV'] = 0
-        self.info['Q_depoTotal'] = 0
-        self.info['Q_depoTotal_th_75keV'] = 0
-        self.info['Q_depoTotal_th_500keV'] = 0
-        self.info['Q_depoTotal_MBox'] = 0
-        self.info['Q_depoTotal_MBox_th_75keV'] = 0
-        self.info['Q_depoTotal_MBox_th_500keV'] = 0
-        self.info['L_depoTotal_avg_220PEpMeV'] = 0
-        self.info['L_depoTotal_avg_180PEpMeV'] = 0
-        self.info['L_depoTotal_avg_140PEpMeV'] = 0
-        self.info['L_depoTotal_avg_100PEpMeV'] = 0
-        self.info['L_depoTotal_avg_35PEpMeV'] = 0
-        self.info['L_depoTotal_MBox_avg_220PEpMeV'] = 0
-        self.info['L_depoTotal_MBox_avg_180PEpMeV'] = 0
-        self.info['L_depoTotal_MBox_avg_140PEpMeV'] = 0
-        self.info['L_depoTotal_MBox_avg_100PEpMeV'] = 0
-        self.info['L_depoTotal_MBox_avg_35PEpMeV'] = 0
-        self.info['E_depoList'] = np.zeros(8) # lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.info['E_depoList_track'] = np.zeros(8)
-        self.info['Q_depoList']               = np.zeros(8)
-        self.info['Q_depoList_th_75keV']      = np.zeros(8)
-        self.info['Q_depoList_th_500keV']     = np.zeros(8)
-        self.info['Q_depoList_dots_th_75keV'] = np.zeros(8)
-        self.info['Q_depoList_MBox']           = np.zeros(8)
-        self.info['Q_depoList_MBox_th_75keV']  = np.zeros(8)
-        self.info['Q_depoList_MBox_th_500keV'] = np.zeros(8)
-        self.info['L_depoList_avg_220PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_avg_180PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_avg_140PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_avg_100PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_avg_35PEpMeV']  = np.zeros(8)
-        self.info['L_depoList_MBox_avg_220PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_MBox_avg_180PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_MBox_avg_140PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_MBox_avg_100PEpMeV'] = np.zeros(8)
-        self.info['L_depoList_MBox_avg_35PEpMeV']  = np.zeros(8)
-        self.info['N_parList'] = np.zeros(8) # lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.info['nu_pdg'] = 0
-        self.info['nu_xs'] = self.vertex.GetCrossSection()
-        self.info['nu_proc'], self.info['nu_nucl'] = self.GetReaction()
-        self.FillEnergyInfo()
+    # ------------------------
+    def UsePrefetched(self, event):
+        # the current entry was already read into event (see Prefetcher)
+        self.simTree.LoadTree(self.currentEntry)
+        self.event = event
+        self.entryLoaded = True
+
+    # ------------------------
+    def iter(self, start=0, stop=None, step=1, batch_size=None, prefetch=True):
+        # Generator over the entries range(start, stop, step) of the chain, ending
+        # at stop (or the last entry). Yields an EventView per entry, or with
+        # batch_size an EventBatch (entries and their info records) per batch_size
+        # entries. With prefetch, the next batch is read in a background thread
+        # while the current one is processed.
+        stop = self.nEntry if stop is None else min(stop, self.nEntry)
+        entries = np.arange(start, stop, step)
+        size = batch_size or 1
+        batches = [entries[k:k+size] for k in range(0, entries.size, size)]
+        prefetcher = Prefetcher(self.fileName, self.branchStatus, batches) if prefetch else None
+        try:
+            for batch in batches:
+                # waiting for the reads counts as GetEntry of the next entry
+                if self.profiler is not None:
+                    self.EndProfiledEvent()
+                events = self.Timed('GetEntry', prefetcher.Next) if prefetcher is not None else [None]*len(batch)
+                if batch_size is None:
+                    self.Jump(int(batch[0]))
+                    if events[0] is not None:
+                        self.UsePrefetched(events[0])
+                    yield EventView(self, int(batch[0]))
+                    continue
+                info = np.empty(len(batch), dtype=self._info.dtype)
+                for j, entry in enumerate(batch):
+                    self.Jump(int(entry))
+                    if events[j] is not None:
+                        self.UsePrefetched(events[j])
+                    info[j] = self.info
+                yield EventBatch(batch, info)
+        finally:
+            if prefetcher is not None:
+                prefetcher.Close()
+
+    # ------------------------
+    def LoadEntry(self):
+        # GetEntry of the current entry, once, by whatever needs the TG4Event
+        if not self.entryLoaded:
+            self.Timed('GetEntry', self.simTree.GetEntry, self.currentEntry)
+            self.entryLoaded = True
+
+    # ------------------------
+    def Require(self, *groups):
+        # compute the groups not computed yet for the current entry
+        for group in groups:
+            if group not in self.computed:
+                self.Timed(self.groups[group].__name__, self.groups[group])
+                self.computed.add(group)
+                if self.cache is not None:
+                    self.StoreGroup(group)
+
+    # ------------------------
+    def Timed(self, stage, func, *args):
+        # func(*args), timed as stage when profiling
+        if self.profiler is None:
+            return func(*args)
+        return self.profiler.Run(stage, func, *args)
+
+    # ------------------------
+    def EndProfiledEvent(self):
+        # closes the timing of the current entry, with the sizes read if any, once
+        if self.profileClosed:
+            return
+        self.profileClosed = True
+        if not self.profiler.eventTimes:
+            return
+        nTracks = self._tracks.size if 'tracks' in self.computed else None
+        nSegments = self._depo['edep'].size if 'depo' in self.computed else None
+        self.profiler.EndEvent(nTracks, nSegments)
+
+    # ------------------------
+    def SaveProfile(self, fileName):
+        # per-stage timing report of the entries so far, .json or .csv
+        self.EndProfiledEvent()
+        self.profiler.Save(fileName)
+
+    @property
+    def vertex(self):
+        self.Require('vertex')
+        return self._vertex
+
+    @property
+    def trajectories(self):
+        self.Require('trajectories')
+        return self._trajectories
+
+    @property
+    def tracks(self):
+        self.Require('tracks')
+        return self._tracks
+
+    @property
+    def depos(self):
+        self.Require('depo')
+        return self._depos
+
+    @property
+    def depo(self):
+        # Qdep / Qdep_MBox columns are there once the charge groups are computed
+        self.Require('depo')
+        return self._depo
+
+    @property
+    def info(self):
+        self.Require('info')
+        return self._info
+
+    @property
+    def neutron(self):
+        self.Require('neutron')
+        return self._neutron
+
+    # ------------------------
+    def FillInfo(self):
+        if self.cache is not None and self.cache.LoadInfo(self.currentEntry, self._info):
+            # cached per file: the entry number in the chain may differ
+            self._info['Event_ID'] = self.currentEntry
+            return
+        self._info[...] = 0
+        self._info['Event_ID'] = self.currentEntry
+        self._info['nu_xs'] = self.vertex.GetCrossSection()
+        self._info['nu_proc'], self._info['nu_nucl'] = self.GetReaction()
+        self.Timed('FillEnergyInfo', self.FillEnergyInfo)
         if self.evgen == 'Genie':
-            self.ReadGenie()
+            self.Timed('ReadGenie', self.ReadGenie)
         elif self.evgen == 'Marley':
-            self.ReadMarley()
+            self.Timed('ReadMarley', self.ReadMarley)
         else:
             print("Unknown event generator!")
             sys.exit()
@@ -131,29 +304,31 @@ class Event:
         # StdHepStatus: 0: initial state; 1: final state particles; others: intermediate transport
         # following assumes the first particle is always the neutrino.
         self.genieTree.GetEntry(self.currentEntry)
-        self.info['nu_pdg'] = self.genieTree.StdHepPdg[0]
-        self.info['E_nu'] = self.genieTree.StdHepP4[3]*1000
+        self._info['nu_pdg'] = self.genieTree.StdHepPdg[0]
+        self._info['E_nu'] = self.genieTree.StdHepP4[3]*1000
 
     # ------------------------
     def ReadMarley(self):
         # we are mostly looking at nue anyway
-        self.info['nu_pdg'] = 12
-        if self.GetnuPDGFromFileName() == 'nue': self.info['nu_pdg'] = 12
-        if self.GetnuPDGFromFileName() == 'numu': self.info['nu_pdg'] = 14
-        if self.GetnuPDGFromFileName() == 'anue': self.info['nu_pdg'] = -12
-        if self.GetnuPDGFromFileName() == 'anumu': self.info['nu_pdg'] = -14
-        self.info['E_nu'] = self.GetEnuFromFileName()
+        self._info['nu_pdg'] = 12
+        if self.GetnuPDGFromFileName() == 'nue': self._info['nu_pdg'] = 12
+        if self.GetnuPDGFromFileName() == 'numu': self._info['nu_pdg'] = 14
+        if self.GetnuPDGFromFileName() == 'anue': self._info['nu_pdg'] = -12
+        if self.GetnuPDGFromFileName() == 'anumu': self._info['nu_pdg'] = -14
+        self._info['E_nu'] = self.GetEnuFromFileName()
         if self.currentEntry == 0: # only print once
             print("Marley events: assert info from file name")
 
     # ------------------------
     def ReadVertex(self):
+        self.CheckCollection('primaries')
+        self.LoadEntry()
         primaries = np.array(self.event.Primaries)
         if (primaries.size != 1 and self.evgen == 'Genie'):
             print("Number of primaries not equal to 1 (not neutrino vertex)!")
             return
 
-        self.vertex = primaries[0]
+        self._vertex = primaries[0]
 
     #--------------------------
     def GetReaction(self):
@@ -185,154 +360,173 @@ class Event:
         proc_num += proc_dict.get(proc, 0)
         return proc_num, nucl
 
+    # ------------------------
+    def ReadTrajectories(self):
+        # the TG4Trajectory objects are only kept for their names and points,
+        # everything else lives in the track table
+        self.CheckCollection('trajectories')
+        self.LoadEntry()
+        self._trajectories = self.event.Trajectories
+
     # ------------------------
     def ReadTracks(self):
-        self.tracks = np.array(self.event.Trajectories)
-        for i in range(self.tracks.size):
-            self.tracks[i].energy = {}
-            self.tracks[i].association = {}
-            self.tracks[i].length = {}
-            self.tracks[i].energy['depoTotal'] = 0
-            self.tracks[i].energy['depoTotal_charge'] = 0
-            self.tracks[i].energy['depoTotal_charge_MBox'] = 0
-            self.tracks[i].energy['depoTotal_charge_th_75keV'] = 0
-            self.tracks[i].energy['depoTotal_charge_MBox_th_75keV'] = 0
-            self.tracks[i].energy['depoTotal_charge_th_500keV'] = 0
-            self.tracks[i].energy['depoTotal_charge_MBox_th_500keV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_220PEpMeV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_220PEpMeV_MBox'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_180PEpMeV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_180PEpMeV_MBox'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_140PEpMeV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_140PEpMeV_MBox'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_100PEpMeV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_100PEpMeV_MBox'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_35PEpMeV'] = 0
-            self.tracks[i].energy['depoTotal_light_avg_35PEpMeV_MBox'] = 0
-            self.tracks[i].length['selfDepo'] = 0
-            self.tracks[i].association['depoList'] = []
-            self.tracks[i].association['children'] = []
-            self.tracks[i].association['ancestor'] = i
-
-        for i in range(self.tracks.size):
-            track = self.tracks[i]
-            parId = track.GetParentId()
-            if parId == -1: continue
-            self.tracks[parId].association['children'].append(i)
-            while parId != -1:
-                track.association['ancestor'] = parId
-                parId = self.tracks[parId].GetParentId()
+        rows = self.cache.LoadTracks(self.currentEntry, 'depo') if self.cache is not None else None
+        if rows is None:
+            self._tracks = TrackTable(self.trajectories, self.ProvideQuantity)
+            return
+        # from the cache: the table and whatever per-track sums are cached
+        self._tracks = TrackTable.FromColumns(rows['trkId'], rows['parentId'], rows['pdg'], rows['momentum'],
+                                              self.ProvideQuantity)
+        self._tracks.SetSelfLength(np.array(rows['selfLength']))
+        for group in QUANTITY_GROUPS:
+            if group != 'depo':
+                rows = self.cache.LoadTracks(self.currentEntry, group)
+            if rows is not None:
+                self._tracks.AddDepoSums({key: rows[key] for key in rows.dtype.names if key not in TRACK_COLUMNS})
 
     # ------------------------
-    def ReadEnergyDepo(self, detName):
-        self.depos = np.array(self.event.SegmentDetectors[detName])
+    def ReadNeutron(self):
+        # the depos of this entry are only read if the lineage needs them
+        self._neutron = NeutronLineage(self.tracks, lambda: self.depo)
+
+    # ------------------------
+    def ReadEnergyDepo(self, detName='SimEnergyDeposit'):
+        self.CheckCollection('segments', detName)
+        self.LoadEntry()
+        self._depos = self.event.SegmentDetectors[detName]
+        # columnar copy of all segments: edep, length, start/stop, primaryId, trkId
+        self._depo = ReadSegments(self._depos)
 
         # add depo info to tracks
         # depoList = self.FindDepoListFromTrack(1)
-        # depoEnergy = np.sum([depo.GetEnergyDeposit() for depo in self.depos[depoList]])
+        # depoEnergy = np.sum(self.depo['edep'][depoList])
         # print('debug: muon deposit energy:', depoEnergy)
         mm2cm = 0.1
-
-        for i, depo in enumerate(self.depos):
-            trkId = depo.Contrib[0]
-            edep = depo.GetEnergyDeposit()
-            trkLength = depo.GetTrackLength() *mm2cm
-            Qdep = self.ChargeBirksLaw(edep, trkLength)
-            Qdep_MBox = self.ChargeModifiedBoxModel(edep, trkLength) # Modified Box Model
-            track = self.tracks[trkId]
-            track.association['depoList'].append(i)
-            track.energy['depoTotal'] += edep
-            track.energy['depoTotal_charge'] += Qdep
-            track.energy['depoTotal_charge_MBox'] += Qdep_MBox
-            track.length['selfDepo'] += trkLength
-            if Qdep > 0.075: track.energy['depoTotal_charge_th_75keV'] += Qdep
-            if Qdep > 0.5: track.energy['depoTotal_charge_th_500keV'] += Qdep
-            if Qdep_MBox > 0.075: track.energy['depoTotal_charge_MBox_th_75keV'] += Qdep_MBox
-            if Qdep_MBox > 0.5: track.energy['depoTotal_charge_MBox_th_500keV'] += Qdep_MBox
-
-            # Light deposit
-            # edepSecond = depo.GetSecondaryDeposit()
-            # Ideally this should be the light dep
-            # how the light yield is actually derived: 25k photons / MeV are simualted and 220 on average are detected
-            # the overall photon collection efficiency (PCE) is
-            #    220/25000=0.88% PCE
-            #    180/25000=0.72% PCE
-            #    140/25000=0.56% PCE
-            #    100/25000=0.4% PCE
-            #    35/25000=0.14% PCE
-
-            #    220/21622=1.0% PCE
-            #    180/21622=0.83% PCE
-            #    140/21622=0.65% PCE
-            #    100/21622=0.46% PCE
-            #    35/21622=0.16% PCE
-            # (dL/W_ph)*PCE = (dL/19.5eV)*PCE = number of photons (taking into account Birks model)
-            Ldep = edep - Qdep
-            Ldep_MBox = edep - Qdep_MBox
-            nPE_220 = (Ldep*1000000/19.5)*0.01
-            nPE_180 = (Ldep*1000000/19.5)*0.0083
-            nPE_140 = (Ldep*1000000/19.5)*0.0065
-            nPE_100 = (Ldep*1000000/19.5)*0.0046
-            nPE_35  = (Ldep*1000000/19.5)*0.0016
-            nPE_220_MBox = Ldep_MBox*220
-            nPE_180_MBox = Ldep_MBox*180
-            nPE_140_MBox = Ldep_MBox*140
-            nPE_100_MBox = Ldep_MBox*100
-            nPE_35_MBox  = Ldep_MBox*35
-            nPE_220_detected = random.gauss(nPE_220, math.sqrt(nPE_220))
-            nPE_180_detected = random.gauss(nPE_180, math.sqrt(nPE_180))
-            nPE_140_detected = random.gauss(nPE_140, math.sqrt(nPE_140))
-            nPE_100_detected = random.gauss(nPE_100, math.sqrt(nPE_100))
-            nPE_35_detected  = random.gauss(nPE_35, math.sqrt(nPE_35))
-            nPE_220_MBox_detected = random.gauss(nPE_220_MBox, math.sqrt(nPE_220_MBox))
-            nPE_180_MBox_detected = random.gauss(nPE_180_MBox, math.sqrt(nPE_180_MBox))
-            nPE_140_MBox_detected = random.gauss(nPE_140_MBox, math.sqrt(nPE_140_MBox))
-            nPE_100_MBox_detected = random.gauss(nPE_100_MBox, math.sqrt(nPE_100_MBox))
-            nPE_35_MBox_detected  = random.gauss(nPE_35_MBox,  math.sqrt(nPE_35_MBox))
-            Ldep_avg_220PEpMeV_detected = nPE_220_detected*19.5/1000000/0.01 # MeV
-            Ldep_avg_180PEpMeV_detected = nPE_180_detected*19.5/1000000/0.0083
-            Ldep_avg_140PEpMeV_detected = nPE_140_detected*19.5/1000000/0.0065
-            Ldep_avg_100PEpMeV_detected = nPE_100_detected*19.5/1000000/0.0046
-            Ldep_avg_35PEpMeV_detected  = nPE_35_detected*19.5/1000000/0.0016
-            Ldep_avg_220PEpMeV_MBox_detected = nPE_220_MBox_detected/220
-            Ldep_avg_180PEpMeV_MBox_detected = nPE_180_MBox_detected/180
-            Ldep_avg_140PEpMeV_MBox_detected = nPE_140_MBox_detected/140
-            Ldep_avg_100PEpMeV_MBox_detected = nPE_100_MBox_detected/100
-            Ldep_avg_35PEpMeV_MBox_detected  = nPE_35_MBox_detected/35
-
-            track.energy['depoTotal_light_avg_220PEpMeV'] += Ldep_avg_220PEpMeV_detected
-            track.energy['depoTotal_light_avg_180PEpMeV'] += Ldep_avg_180PEpMeV_detected
-            track.energy['depoTotal_light_avg_140PEpMeV'] += Ldep_avg_140PEpMeV_detected
-            track.energy['depoTotal_light_avg_100PEpMeV'] += Ldep_avg_100PEpMeV_detected
-            track.energy['depoTotal_light_avg_35PEpMeV']  += Ldep_avg_35PEpMeV_detected
-
-            track.energy['depoTotal_light_avg_220PEpMeV_MBox'] += Ldep_avg_220PEpMeV_MBox_detected
-            track.energy['depoTotal_light_avg_180PEpMeV_MBox'] += Ldep_avg_180PEpMeV_MBox_detected
-            track.energy['depoTotal_light_avg_140PEpMeV_MBox'] += Ldep_avg_140PEpMeV_MBox_detected
-            track.energy['depoTotal_light_avg_100PEpMeV_MBox'] += Ldep_avg_100PEpMeV_MBox_detected
-            track.energy['depoTotal_light_avg_35PEpMeV_MBox']  += Ldep_avg_35PEpMeV_MBox_detected
-
-        # E_tot = np.sum([depo.GetEnergyDeposit() for depo in self.depos])
+        self._depo['dx'] = self._depo['length']*mm2cm # cm
+        # per-track sums are added group by group, see TrackSum; a segment
+        # without contributor (trkId -1) belongs to no track, it is binned
+        # past the last track and left out of the sums
+        trkId = self._depo['trkId']
+        self._depoBin = np.where(trkId >= 0, trkId, self.tracks.size)
+        self.tracks.SetDepos(trkId, self.TrackSum(self._depo['dx']))
+        self.tracks.AddDepoSums({'depoTotal': self.TrackSum(self._depo['edep'])})
+
+        # E_tot = np.sum(self.depo['edep'])
         # print('total deposit energy: ', E_tot)
 
+    # ------------------------
+    def TrackSum(self, weights):
+        # per-track sums in one pass over all depos
+        n = self.tracks.size
+        return np.bincount(self._depoBin, weights=weights, minlength=n+1)[:n]
+
+    # ------------------------
+    def FillCharge(self, model=''):
+        edep = self.depo['edep']
+        if model == '_MBox':
+            Q = self.ChargeModifiedBoxModel(edep, self.depo['dx']) # Modified Box Model
+        else:
+            Q = self.ChargeBirksLaw(edep, self.depo['dx'])
+        self.depo['Qdep' + model] = Q
+        trackSums = {'depoTotal_charge' + model: self.TrackSum(Q)}
+        for label, threshold in self.thresholds.items():
+            trackSums['depoTotal_charge%s_th_%s' % (model, label)] = self.TrackSum(np.where(Q > threshold, Q, 0))
+        self.tracks.AddDepoSums(trackSums)
+
+    # ------------------------
+    def FillChargeMBox(self):
+        self.FillCharge('_MBox')
+
+    # ------------------------
+    def FillLight(self):
+        self.Require('charge', 'charge_MBox')
+        edep = self.depo['edep']
+        # Light deposit, smeared for all depos and light yields at once
+        # edepSecond = depo.GetSecondaryDeposit()
+        # Ideally this should be the light dep
+        Ldep, Ldep_MBox = self.light.Smear(edep - self.depo['Qdep'], edep - self.depo['Qdep_MBox'], self.currentEntry)
+        trackSums = {}
+        for j, ly in enumerate(self.light.lightYields):
+            trackSums['depoTotal_light_' + LightLabel(ly)] = self.TrackSum(Ldep[:, j])
+            trackSums['depoTotal_light_' + LightLabel(ly) + '_MBox'] = self.TrackSum(Ldep_MBox[:, j])
+        self.tracks.AddDepoSums(trackSums)
+
+    # ------------------------
+    def ProvideQuantity(self, key):
+        # computes the group a per-track quantity belongs to, when first asked for
+        self.Require(QuantityGroup(key))
+
+    # ------------------------
+    def TrackRows(self, group):
+        # per-track rows of a quantity group, as cached
+        keys = [key for key in self.tracks.quantities if QuantityGroup(key) == group]
+        fields = [(key, 'f8') for key in keys]
+        if group == 'depo':
+            fields = [('trkId', 'i4'), ('parentId', 'i4'), ('pdg', 'i4'), ('momentum', 'f8', (4,)),
+                      ('selfLength', 'f8')] + fields
+        rows = np.zeros(self.tracks.size, dtype=fields)
+        if group == 'depo':
+            for key in TRACK_COLUMNS:
+                rows[key] = getattr(self.tracks, key)
+        for key in keys:
+            rows[key] = self.tracks.Depo(key)
+        return rows
+
+    # ------------------------
+    def StoreGroup(self, group):
+        if group == 'info':
+            self.cache.StoreInfo(self.currentEntry, self._info)
+        elif group in QUANTITY_GROUPS and not self.cache.HasTracks(self.currentEntry, group):
+            self.cache.StoreTracks(self.currentEntry, group, self.TrackRows(group))
+
+    # ------------------------
+    def CacheConfig(self):
+        # what each quantity group depends on, hashed into the cache keys
+        recombination = {'ionization': IONIZATION_RATIO, 'density': LAR_DENSITY}
+        birks = dict(recombination, **BIRKS)
+        mbox = dict(recombination, **MBOX)
+        # the per-category info fields of every group depend on the categories
+        common = {'evgen': self.evgen, 'categories': sorted(PDG_CATEGORY.items())}
+        # the scans only enter the groups of their observables, when set
+        scanQ = {'scanThresholds': self.scanThresholds.tolist()} if self.scanThresholds.size else {}
+        scanL = {'scanLengthCuts': self.scanLengthCuts.tolist()} if self.scanLengthCuts.size else {}
+        return {
+            'depo'        : dict(common, **scanL),
+            'charge'      : dict(common, Birks=birks, thresholds=self.thresholds, **scanQ, **scanL),
+            'charge_MBox' : dict(common, MBox=mbox, thresholds=self.thresholds, **scanQ),
+            'light'       : dict(common, Birks=birks, MBox=mbox, W_ph=W_PH,
+                                 lightYields=[float(ly) for ly in self.light.lightYields],
+                                 scaleBirks=[float(x) for x in self.light.scaleBirks],
+                                 seed=int(self.light.seed), fluctuation=self.light.fluctuation),
+        }
+
+    # ------------------------
+    def ChainFiles(self):
+        # files of the chain and the first entry of each (plus the total)
+        nTrees = self.simTree.GetNtrees()
+        offsets = self.simTree.GetTreeOffset()
+        files = [element.GetTitle() for element in self.simTree.GetListOfFiles()]
+        return files, np.array([offsets[i] for i in range(nTrees)] + [self.nEntry], dtype=np.int64)
 
     # ------------------------
     def ChargeBirksLaw(self, edep, trkLength):
+        # works on scalars or on whole-event arrays of edep [MeV] and dx [cm]
         # PHYS. REV. D 99, 036009 (2019)
         # return R = (dQ/dx)/(dE/dx) = dQ/dE = A/(1+kQ*dE/dx)
         # A = 0.8, kQ = 0.0972 g/(MeV*cm2) @500V/cm
         # LAr density 1.4g/cm^3
         # when considering light, need to take account excitation and ionization ratio (0.83 vs 0.17)
-        return 0.83*edep*0.8/(1+0.0972*edep/trkLength/1.4)
+        return IONIZATION_RATIO*edep*BIRKS['A']/(1+BIRKS['kQ']*edep/trkLength/LAR_DENSITY)
 
     # ------------------------
     def ChargeModifiedBoxModel(self, edep, trkLength):
+        # works on scalars or on whole-event arrays of edep [MeV] and dx [cm]
         # https://lar.bnl.gov/properties/pass.html
         # return R = (dQ/dx)/(dE/dx) = dQ/dE = ln(A+B*dE/dx)/(B*dE/dx)
         # A = 0.930, B = 0.424 g/(MeV*cm2) @500V/cm
         # LAr density 1.4g/cm^3
         # when considering light, need to take account excitation and ionization ratio (0.83 vs 0.17)
-        return 0.83*edep*np.log(0.930+0.424*edep/trkLength/1.4)/(0.424*edep/trkLength/1.4)
+        return IONIZATION_RATIO*edep*np.log(MBOX['A']+MBOX['B']*edep/trkLength/LAR_DENSITY)/(MBOX['B']*edep/trkLength/LAR_DENSITY)
 
     # ------------------------
     def FindDepoListFromTrack(self, trkId):
@@ -345,9 +539,9 @@ class Event:
     # ------------------------
     def PrintVertex(self):
         if self.evgen == 'Genie':
-            self.info['nu_pdg'] = self.genieTree.StdHepPdg[0]
-            self.info['E_nu'] = self.genieTree.StdHepP4[3]*1000
-            print(f"neutrino {self.info['nu_pdg']}: {self.info['E_nu']} MeV")
+            # nu_pdg and E_nu are read from gRooTracker for this entry by ReadGenie
+            info = self.info
+            print(f"neutrino {info['nu_pdg']}: {info['E_nu']} MeV")
         elif self.evgen == 'Marley':
             self.ReadMarley()
         else:
@@ -385,320 +579,121 @@ class Event:
         #print(f'{self.info}')
 
     # ------------------------
-    def FillEnergyInfo(self):
+    def InitCategoryProducers(self):
+        # the producers of the per-category (total, list) pairs of the schema, in order,
+        # and for each of their fields the producer column it is filled from
+        self.categoryProducers = []
+        self.categoryFields = []
+        # the *_scan fields, filled by FillScan
+        self.scanFields = []
+        for obs in self.schema:
+            if obs.producer in ('entry', 'generator', 'vertex', 'count'):
+                continue
+            if obs.producer.startswith('scan'):
+                self.scanFields.append(obs)
+                continue
+            if obs.producer not in self.categoryProducers:
+                self.categoryProducers.append(obs.producer)
+            self.categoryFields.append((obs.name, self.categoryProducers.index(obs.producer), obs.shape != ()))
 
+    # ------------------------
+    def FillEnergyInfo(self):
+        trkIds, pdgs, energies, masses = [], [], [], []
         for particle in self.vertex.Particles:
             trkId = particle.GetTrackId()
             # Skip negative trk id: in the case of Marley events,
             # this usually is the final nucleus before deexcitation that G4 doesn't track
             # the kinematics are not correct either
             if trkId < 0: continue
-            pdg = particle.GetPDGCode()
-            depoE = self.GetEnergyDepoWithDesendents(trkId)
-            track = self.tracks[trkId]
-            # if longer than 2cm, assume can reconstruct dE
-            if track.length['selfDepo'] > 2:
-                depoE_track = track.energy['depoTotal']
-                depoQ_dots = 0
-            else:
-                # dots/blips
-                depoE_track = 0
-                depoQ_dots = track.energy['depoTotal_charge_th_75keV']
-            depoQ        = self.GetChargeDepoWithDesendents(trkId)[0]
-            depoQ_75keV  = self.GetChargeDepoWithDesendents(trkId)[1]
-            depoQ_500keV = self.GetChargeDepoWithDesendents(trkId)[2]
-            depoQ_MBox        = self.GetChargeMBoxDepoWithDesendents(trkId)[0]
-            depoQ_MBox_75keV  = self.GetChargeMBoxDepoWithDesendents(trkId)[1]
-            depoQ_MBox_500keV = self.GetChargeMBoxDepoWithDesendents(trkId)[2]
-            depoL_220PEpMeV = self.GetLightDepoWithDesendents(trkId)[0]
-            depoL_180PEpMeV = self.GetLightDepoWithDesendents(trkId)[1]
-            depoL_140PEpMeV = self.GetLightDepoWithDesendents(trkId)[2]
-            depoL_100PEpMeV = self.GetLightDepoWithDesendents(trkId)[3]
-            depoL_35PEpMeV  = self.GetLightDepoWithDesendents(trkId)[4]
-            depoL_MBox_220PEpMeV = self.GetLightMBoxDepoWithDesendents(trkId)[0]
-            depoL_MBox_180PEpMeV = self.GetLightMBoxDepoWithDesendents(trkId)[1]
-            depoL_MBox_140PEpMeV = self.GetLightMBoxDepoWithDesendents(trkId)[2]
-            depoL_MBox_100PEpMeV = self.GetLightMBoxDepoWithDesendents(trkId)[3]
-            depoL_MBox_35PEpMeV  = self.GetLightMBoxDepoWithDesendents(trkId)[4]
             mom = particle.GetMomentum()
-            mass = mom.M()
-            KE = mom.E() - mass
-            self.info['E_depoTotal'] += depoE
-            self.info['E_depoTotal_track'] += depoE_track
-            self.info['Q_depoTotal'] += depoQ
-            self.info['Q_depoTotal_th_75keV'] += depoQ_75keV
-            self.info['Q_depoTotal_th_500keV'] += depoQ_500keV
-            self.info['Q_depoTotal_dots_th_75keV'] += depoQ_dots
-            self.info['Q_depoTotal_MBox'] += depoQ_MBox
-            self.info['Q_depoTotal_MBox_th_75keV'] += depoQ_MBox_75keV
-            self.info['Q_depoTotal_MBox_th_500keV'] += depoQ_MBox_500keV
-            self.info['L_depoTotal_avg_220PEpMeV'] += depoL_220PEpMeV
-            self.info['L_depoTotal_avg_180PEpMeV'] += depoL_180PEpMeV
-            self.info['L_depoTotal_avg_140PEpMeV'] += depoL_140PEpMeV
-            self.info['L_depoTotal_avg_100PEpMeV'] += depoL_100PEpMeV
-            self.info['L_depoTotal_avg_35PEpMeV']  += depoL_35PEpMeV
-            self.info['L_depoTotal_MBox_avg_220PEpMeV'] += depoL_MBox_220PEpMeV
-            self.info['L_depoTotal_MBox_avg_180PEpMeV'] += depoL_MBox_180PEpMeV
-            self.info['L_depoTotal_MBox_avg_140PEpMeV'] += depoL_MBox_140PEpMeV
-            self.info['L_depoTotal_MBox_avg_100PEpMeV'] += depoL_MBox_100PEpMeV
-            self.info['L_depoTotal_MBox_avg_35PEpMeV']  += depoL_MBox_35PEpMeV
-            # fill E_availList: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-            if (pdg in [13, -13, 11, -11]):
-                self.info['E_avail'] += (KE + mass)
-                self.info['E_availList'][0] += (KE + mass)
-                self.info['E_depoList'][0]       += depoE
-                self.info['E_depoList_track'][0] += depoE_track
-                self.info['Q_depoList'][0]                += depoQ
-                self.info['Q_depoList_th_75keV'][0]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][0]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][0]  += depoQ_dots
-                self.info['Q_depoList_MBox'][0]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][0]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][0] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][0] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][0] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][0] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][0] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][0]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][0] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][0] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][0] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][0] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][0]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][0] += 1
-            elif (pdg == 2212): # proton
-                self.info['E_avail'] += KE
-                self.info['E_availList'][1] += KE
-                self.info['E_depoList'][1]       += depoE
-                self.info['E_depoList_track'][1] += depoE_track
-                self.info['Q_depoList'][1]                += depoQ
-                self.info['Q_depoList_th_75keV'][1]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][1]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][1]  += depoQ_dots
-                self.info['Q_depoList_MBox'][1]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][1]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][1] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][1] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][1] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][1] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][1] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][1]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][1] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][1] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][1] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][1] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][1]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][1] += 1
-            elif (pdg == 2112): # neutron
-                self.info['E_avail'] += KE
-                self.info['E_availList'][2] += KE
-                self.info['E_depoList'][2]       += depoE
-                self.info['E_depoList_track'][2] += depoE_track
-                self.info['Q_depoList'][2]                += depoQ
-                self.info['Q_depoList_th_75keV'][2]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][2]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][2]  += depoQ_dots
-                self.info['Q_depoList_MBox'][2]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][2]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][2] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][2] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][2] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][2] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][2] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][2]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][2] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][2] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][2] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][2] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][2]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][2] += 1
-            elif (pdg in [211, -211]): #pi+/-
-                self.info['E_avail'] += (KE + mass)
-                self.info['E_availList'][3] += (KE + mass)
-                self.info['E_depoList'][3]       += depoE
-                self.info['E_depoList_track'][3] += depoE_track
-                self.info['Q_depoList'][3]                += depoQ
-                self.info['Q_depoList_th_75keV'][3]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][3]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][3]  += depoQ_dots
-                self.info['Q_depoList_MBox'][3]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][3]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][3] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][3] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][3] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][3] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][3] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][3]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][3] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][3] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][3] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][3] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][3]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][3] += 1
-            elif (pdg == 111): #pi0
-                self.info['E_avail'] += (KE + mass)
-                self.info['E_availList'][4] += (KE + mass)
-                self.info['E_depoList'][4]       += depoE
-                self.info['E_depoList_track'][4] += depoE_track
-                self.info['Q_depoList'][4]                += depoQ
-                self.info['Q_depoList_th_75keV'][4]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][4]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][4]  += depoQ_dots
-                self.info['Q_depoList_MBox'][4]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][4]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][4] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][4] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][4] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][4] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][4] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][4]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][4] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][4] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][4] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][4] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][4]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][4] += 1
-            elif (pdg == 22): #gamma
-                self.info['E_avail'] += (KE + mass)
-                self.info['E_availList'][5] += (KE + mass)
-                self.info['E_depoList'][5]       += depoE
-                self.info['E_depoList_track'][5] += depoE_track
-                self.info['Q_depoList'][5]                += depoQ
-                self.info['Q_depoList_th_75keV'][5]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][5]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][5]  += depoQ_dots
-                self.info['Q_depoList_MBox'][5]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][5]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][5] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][5] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][5] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][5] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][5] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][5] += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][5] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][5] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][5] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][5] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][5]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][5] += 1
-            elif (pdg == 1000020040): #alpha
-                self.info['E_avail'] += KE
-                self.info['E_availList'][6] += KE
-                self.info['E_depoList'][6]       += depoE
-                self.info['E_depoList_track'][6] += depoE_track
-                self.info['Q_depoList'][6]                += depoQ
-                self.info['Q_depoList_th_75keV'][6]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][6]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][6]  += depoQ_dots
-                self.info['Q_depoList_MBox'][6]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][6]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][6] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][6] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][6] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][6] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][6] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][6]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][6] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][6] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][6] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][6] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][6]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][6] += 1
+            trkIds.append(trkId)
+            pdgs.append(particle.GetPDGCode())
+            energies.append(mom.E())
+            masses.append(mom.M())
+        trkIds = np.array(trkIds, dtype=np.int32)
+        mass = np.array(masses)
+        KE = np.array(energies) - mass
+        cat = Category(pdgs)
+
+        # if longer than 2cm, assume can reconstruct dE, otherwise dots/blips
+        isTrack = self.tracks.selfLength[trkIds] > 2
+
+        # one row per primary, one column per producer
+        columns = []
+        for producer in self.categoryProducers:
+            kind, _, quantity = producer.partition(':')
+            if kind == 'available':
+                # available energy, including mass if meson or lepton
+                columns.append(np.where(MASS_INCLUDED[cat], KE + mass, KE))
+            elif kind == 'track':
+                columns.append(np.where(isTrack, self.tracks.Depo(quantity)[trkIds], 0))
+            elif kind == 'blip':
+                columns.append(np.where(isTrack, 0, self.tracks.Depo(quantity)[trkIds]))
+            else:
+                columns.append(self.tracks.DepoWithDesendents(quantity)[trkIds])
+
+        sums = SumByCategory(cat, np.column_stack(columns).reshape(trkIds.size, len(columns)))
+        for name, j, perCategory in self.categoryFields:
+            self._info[name] = sums[:, j] if perCategory else sums[:, j].sum()
+        self._info['N_parList'] = np.bincount(cat, minlength=N_CATEGORIES)
+        if self.scanFields:
+            self.FillScan(trkIds, cat)
+
+    # ------------------------
+    def FillScan(self, trkIds, cat):
+        # trkIds, cat: the primaries and their category, as in FillEnergyInfo
+        for obs in self.scanFields:
+            kind, _, quantity = obs.producer.partition(':')
+            if kind == 'scan':
+                self.Require(QuantityGroup(quantity))
+                Q = self.depo['Qdep' + quantity[len('depoTotal_charge'):]]
+                allSums = SubtreeSums(self.ScanSums(Q), self.tracks.parentId, self.tracks.depth)
+                self._info[obs.name] = SumByCategory(cat, allSums[trkIds]).T
+                continue
+            # (n_primaries, n_cuts): longer than each cut, assume can reconstruct dE
+            isTrack = self.tracks.selfLength[trkIds][:, None] > self.scanLengthCuts
+            depo = self.tracks.Depo(quantity)[trkIds][:, None]
+            if kind == 'scan_track':
+                self._info[obs.name] = SumByCategory(cat, np.where(isTrack, depo, 0)).T
             else:
-                self.info['E_avail'] += KE
-                self.info['E_availList'][7] += KE
-                self.info['E_depoList'][7]       += depoE
-                self.info['E_depoList_track'][7] += depoE_track
-                self.info['Q_depoList'][7]                += depoQ
-                self.info['Q_depoList_th_75keV'][7]       += depoQ_75keV
-                self.info['Q_depoList_th_500keV'][7]      += depoQ_500keV
-                self.info['Q_depoList_dots_th_75keV'][7]  += depoQ_dots
-                self.info['Q_depoList_MBox'][7]           += depoQ_MBox
-                self.info['Q_depoList_MBox_th_75keV'][7]  += depoQ_MBox_75keV
-                self.info['Q_depoList_MBox_th_500keV'][7] += depoQ_MBox_500keV
-                self.info['L_depoList_avg_220PEpMeV'][7] += depoL_220PEpMeV
-                self.info['L_depoList_avg_180PEpMeV'][7] += depoL_180PEpMeV
-                self.info['L_depoList_avg_140PEpMeV'][7] += depoL_140PEpMeV
-                self.info['L_depoList_avg_100PEpMeV'][7] += depoL_100PEpMeV
-                self.info['L_depoList_avg_35PEpMeV'][7]  += depoL_35PEpMeV
-                self.info['L_depoList_MBox_avg_220PEpMeV'][7] += depoL_MBox_220PEpMeV
-                self.info['L_depoList_MBox_avg_180PEpMeV'][7] += depoL_MBox_180PEpMeV
-                self.info['L_depoList_MBox_avg_140PEpMeV'][7] += depoL_MBox_140PEpMeV
-                self.info['L_depoList_MBox_avg_100PEpMeV'][7] += depoL_MBox_100PEpMeV
-                self.info['L_depoList_MBox_avg_35PEpMeV'][7]  += depoL_MBox_35PEpMeV
-                self.info['N_parList'][7] += 1
-
-        # for track in self.tracks:
-        #     pdg = track.GetPDGCode()
-        #     depoE = track.energy['depoTotal']
-        #     if (pdg in [13, -13, 11, -11]):
-        #         self.info['E_depoList'][0] += depoE
-        #     elif (pdg == 2212):
-        #         self.info['E_depoList'][1] += depoE
-        #     elif (pdg == 2112):
-        #         self.info['E_depoList'][2] += depoE
-        #     elif (pdg in [211, -211]):
-        #         self.info['E_depoList'][3] += depoE
-        #     elif (pdg == 111):
-        #         self.info['E_depoList'][4] += depoE
-        #     else:
-        #         self.info['E_depoList'][5] += depoE
-    #this is a primary function i design to find the ancester, but i think there are easier way of doing so
+                self._info[obs.name] = SumByCategory(cat, np.where(isTrack, 0, depo)).T
+
+    # ------------------------
+    def ScanSums(self, Q):
+        # (n_tracks, n_thresholds) per-track sums of the depos with Q above each scan
+        # threshold, in one pass: each depo is binned by the number of thresholds
+        # below it, and the bins are summed from the top down
+        order = np.argsort(self.scanThresholds)
+        n = order.size
+        below = np.searchsorted(self.scanThresholds[order], Q)
+        hist = np.bincount(self._depoBin*(n+1) + below, weights=Q,
+                           minlength=(self.tracks.size+1)*(n+1)).reshape(self.tracks.size+1, n+1)[:-1]
+        sums = np.empty((self.tracks.size, n))
+        sums[:, order] = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        return sums
+
+    # nearest neutron among the track and its ancestors, else the primary it descends from
     def loopover(self,pdg,track):
-        while pdg != 2112:
-            ParentId = track.GetParentId()
-            track = self.tracks[ParentId]
-            pdg = track.GetPDGCode()
-            # Break out of the loop if there is no parent (ParentId == -1)
-            if ParentId == -1:
-                break
-        return pdg,track
+        i = track.GetTrackId()
+        j = self.tracks.neutronAncestor[i]
+        if j < 0:
+            j = self.tracks.ancestor[i]
+        return int(self.tracks.pdg[j]), self.trajectories[j]
 
     def PrintTracksEnergy(self):
-        # Loop over all tracks
-        switch=0
-        for i in range(self.tracks.size):
-            track = self.tracks[i]
-            pdg_original = track.GetPDGCode()
-            pdg = track.GetPDGCode()  # Get the PDG code of the particle
-            track_energy = track.energy.get('depoTotal', 0)
-            # Trace back to the parent particle until we find a neutron (PDG code 2112)
-            pdg, track = self.loopover(pdg, track)
-            ParentId = track.GetParentId()
-            while pdg == 2112 and ParentId != -1:
-                track = self.tracks[ParentId]
-                pdg = track.GetPDGCode()
-                pdg, track = self.loopover(pdg, track)
-                ParentId = track.GetParentId()
-            if pdg == 2112 and ParentId == -1 :
-                # Instead of printing, store the tuple (or you can use a dict)
-                switch=1
-               # results.append(\n)
-        return switch
+        # 1 if some track descends from a primary neutron
+        return int(self.neutron.tracks.size > 0)
 
     #for now this function is totally useless because we are still wondering if neutron can deposit a lot of energy
     def PrintTracksEnergy_ignoreneutron(self):
         results = []  # Initialize an empty list
-        # Loop over all tracks
-        for i in range(self.tracks.size):
-            track = self.tracks[i]
-            pdg_original = track.GetPDGCode()
-            pdg = track.GetPDGCode()  # Get the PDG code of the particle
-            track_energy = track.energy.get('depoTotal', 0)
-            # Trace back to the parent particle until we find a neutron (PDG code 2112)
-            pdg, track = self.loopover(pdg, track)
-            ParentId = track.GetParentId()
-            while pdg == 2112 and ParentId != -1:
-                track = self.tracks[ParentId]
-                pdg = track.GetPDGCode()
-                pdg, track = self.loopover(pdg, track)
-                ParentId = track.GetParentId()
-            if pdg == 2112 and ParentId == -1 and track_energy>0.5 and pdg_original!=2112:
-                # Instead of printing, store the tuple (or you can use a dict)
-                results_new.append(("(ignore neutron the particle is:",pdg_original,"ignore nuetron the energy it deposit is:" ,track_energy))
-               # results.append(\n)
-        print(results_new)
-        return results_new
+        lineage = self.neutron
+        # selected tracks, without the neutrons themselves
+        selected = lineage.selected[self.tracks.pdg[lineage.selected] != 2112]
+        for i in selected:
+            results.append(("(ignore neutron the particle is:",int(self.tracks.pdg[i]),"ignore nuetron the energy it deposit is:" ,lineage.energy[i]))
+        print(results)
+        return results
     
 
 
@@ -707,31 +702,10 @@ class Event:
     #
     def select_the_right_track(self):
         results = []  # Initialize an empty list
-        # Loop over all tracks
-        right_track=[]
-        for i in range(self.tracks.size):
-            track = self.tracks[i]
-            for point in track.Points:
-                x = point.GetPosition().X()
-                y = point.GetPosition().Y()
-                z = point.GetPosition().Z()
-                t = point.GetPosition().T()
-            pdg_original = track.GetPDGCode()
-            pdg = track.GetPDGCode()  # Get the PDG code of the particle
-            track_energy = track.energy.get('depoTotal', 0)
-            # Trace back to the parent particle until we find a neutron (PDG code 2112)
-            pdg, track = self.loopover(pdg, track)
-            ParentId = track.GetParentId()
-            while pdg == 2112 and ParentId != -1:
-                track = self.tracks[ParentId]
-                pdg = track.GetPDGCode()
-                pdg, track = self.loopover(pdg, track)
-                ParentId = track.GetParentId()
-            if pdg == 2112 and ParentId == -1 and track_energy>0.5:
-                # Instead of printing, store the tuple (or you can use a dict)
-                results.append((pdg_original,x,y,z,t))
-                right_track.append(i)
-               # results.append(\n)
+        right_track = list(self.neutron.selected)
+        for i in right_track:
+            point = self.LastPoint(i)
+            results.append((int(self.tracks.pdg[i]),) + (point if point is not None else (None,)*4))
         print(results)
        #print(right_track)
         return right_track
@@ -752,27 +726,23 @@ class Event:
 
     # ------------------------
     def PrintTrack(self, trkId):
-        self.PrintTracks(trkId, trkId+1)
-        track = self.tracks[trkId]
-        children = track.association['children']
-        #print(f'children: {children}')
-        for childId in children:
-            child = self.tracks[childId]
-            name = child.GetName()
-            mom = child.GetInitialMomentum()
-            KE = mom.E() - mom.M()
-            #print(f"{childId} {name}: {KE:.2f} MeV, {child.energy['depoTotal']:.2f} MeV, {child.association['children']}")
-
-        #print(f"{track.Points.size()} points stored in track {trkId}")
-        for point in track.Points:
-            x = point.GetPosition().X()
-            y = point.GetPosition().Y()
-            z = point.GetPosition().Z()
-            t = point.GetPosition().T()
-            #print(f"{point.GetProcess()}, {point.GetSubprocess()}, {x}, {y}, {z}, {t}")
-
-        #print(f"{point.GetProcess()}, {point.GetSubprocess()}, {x}, {y}, {z}, {t}")
-        return t # last point is capture time
+        #print(f"{self.trajectories[trkId].Points.size()} points stored in track {trkId}")
+        point = self.LastPoint(trkId)
+        if point is None:
+            return None
+        return point[3] # last point is capture time
+
+    # ------------------------
+    def LastPoint(self, trkId):
+        # X, Y, Z [mm], T [ns] of the final trajectory point of the track, without
+        # going through the others; None if the track has no point
+        self.CheckCollection('points')
+        points = self.trajectories[trkId].Points
+        if points.size() == 0:
+            return None
+        pos = points[points.size()-1].GetPosition()
+        return (pos.X(), pos.Y(), pos.Z(), pos.T())
+
     def reorder_by_time(self,coordinates):
         """
         Reorders a list of coordinate sets based on the time (t) component.
@@ -796,52 +766,11 @@ class Event:
 
         neutrontrkId = -1
         neutronKE = -1
-        numbers=self.select_the_right_track()
-        for track in self.tracks[numbers]:
-            pdg = track.GetPDGCode()
-            #print("the particle is:",pdg)
-            name = track.GetName()
-            trkId = track.GetTrackId()
-            parId = track.GetParentId()
-            mom = track.GetInitialMomentum()
-            # print("the momentum is :",mom)
-            px = track.GetInitialMomentum().X()
-            py = track.GetInitialMomentum().Y()
-            pz = track.GetInitialMomentum().Z()
-            pE = track.GetInitialMomentum().E()
-            pM = track.GetInitialMomentum().M()
-            coordinate=[]
-            for point in track.Points:
-               x = point.GetPosition().X()
-               y = point.GetPosition().Y()
-               z = point.GetPosition().Z()
-               t = point.GetPosition().T()
-            coordinate.append([x, y, z, t])
-        
-            
-            #print("the x,y,z,t coordinate of the track:",x,y,z,t)
-            #print("the 3 momentum are:",px,py,pz,"the energy is:",pE,"the mass is:",pM,)
-            mass = mom.M()
-            KE = mom.E() - mass
-            #print("the kenitic energy is: ",KE)
-            p_square=(px**2+py**2+pz**2)**0.5
-            direction_vector=[]
-            direction_vector.append(px/p_square)
-            direction_vector.append(py/p_square)
-            direction_vector.append(pz/p_square)
-            #if KE>=2:
-            #    print(direction_vector)
-            #else:
-            #    print("direction undetermined")
-            ancestor = track.association['ancestor']
-            selfDepo = track.energy['depoTotal']
-            allDepo = self.GetEnergyDepoWithDesendents(trkId)
-            #print(f"{pdg:>8d}{name:>8s}{trkId:>6d}{parId:>6d}{ancestor:>6d}{KE:>10.2f}{selfDepo:>10.2f}{allDepo:>10.2f}")
-            # Take the last neutron and check its KE and capture time
-            if pdg == 2112:
-                neutrontrkId = trkId
-                neutronKE = KE
-        
+        # Take the last neutron among the selected tracks and check its KE and capture time
+        i = self.neutron.lastNeutron
+        if i >= 0:
+            neutrontrkId = int(self.tracks.trkId[i])
+            neutronKE = float(self.tracks.KE[i])
         #print('-'*(8+8+6+6+6+10+10+10))
         return [neutrontrkId, neutronKE]
 
@@ -866,76 +795,59 @@ class Event:
         print("cos_theta is: ", cos_between)
         return cos_between
 
-    def edep_based_information(self)
-        information=[]
+    # ------------------------
+    def NeutronCaptures(self, start=0, stop=None, step=1):
+        # trkId, KE and capture of the last neutron (see PrintTracks and PrintTrack)
+        # of the entries range(start, stop, step): (n,) neutron.CAPTURE_DTYPE records
+        records = []
+        for view in self.iter(start, stop, step):
+            i = view.neutron.lastNeutron
+            if i < 0:
+                records.append((view.entry, -1, np.nan, np.nan, (np.nan,)*3))
+                continue
+            x, y, z, t = view.LastPoint(i) or (np.nan,)*4
+            records.append((view.entry, view.tracks.trkId[i], view.tracks.KE[i], t, (x, y, z)))
+        return np.array(records, dtype=CAPTURE_DTYPE)
+
+    # ------------------------
+    def NeutronDirections(self, start=0, stop=None, step=1, threshold=0.5):
+        # cos_theta over the entries range(start, stop, step), without prints:
+        # (n,) neutron.DIRECTION_DTYPE records, NaN where cos_theta gives None.
+        # threshold [MeV]: minimum energy of the depos used for the reconstruction
+        entries, nPrimary, momentum, depoEntry, weighted = [], [], [], [], []
+        for view in self.iter(start, stop, step):
+            lineage = view.neutron
+            entries.append(view.entry)
+            nPrimary.append(lineage.primaries.size)
+            if lineage.primaries.size != 1:
+                momentum.append(np.zeros(3))
+                continue
+            momentum.append(view.tracks.momentum[lineage.primaries[0], :3])
+            keep = lineage.edep >= threshold
+            weighted.append(lineage.points[keep, :3] * lineage.edep[keep, None])
+            depoEntry.append(np.full(weighted[-1].shape[0], len(entries) - 1))
+        if not weighted:
+            weighted, depoEntry = [np.zeros((0, 3))], [np.zeros(0, dtype=int)]
+        return DirectionRecords(entries, nPrimary, momentum, np.concatenate(depoEntry), np.concatenate(weighted))
+
+    def edep_based_information(self):
+        # (n, 5) X, Y, Z [cm], T [ns], edep [MeV] of the depos of the tracks from the neutron
         trig = self.selectneutronevent()
-        mm2cm=0.1
-        if trig == 1:
-            for i in range(self.tracks.size):
-                track_origin = self.tracks[i]
-                track= self.tracks[i]
-                pdg_original = track.GetPDGCode()
-                pdg = track.GetPDGCode()  # Get the PDG code of the particle
-                track_energy = track.energy.get('depoTotal', 0)
-                # Trace back to the parent particle until we find a neutron (PDG code 2112)
-                pdg, track = self.loopover(pdg, track)
-                ParentId = track.GetParentId()
-                while pdg == 2112 and ParentId != -1:
-                    track = self.tracks[ParentId]
-                    pdg = track.GetPDGCode()
-                    pdg, track = self.loopover(pdg, track)
-                    ParentId = track.GetParentId()
-                if pdg == 2112 and ParentId == -1 :
-                    depoList = track_origin.association['depoList']
-                    for di in depoList:
-                        if di < 0 or di >= len(self.depos):
-                            continue  # 防止越界
-
-                        depo = self.depos[di]
-                        x = (depo.GetStart().X() + depo.GetStop().X()) / 2 * mm2cm
-                        y = (depo.GetStart().Y() + depo.GetStop().Y()) / 2 * mm2cm
-                        z = (depo.GetStart().Z() + depo.GetStop().Z()) / 2 * mm2cm
-                        t = (depo.GetStart().T() + depo.GetStop().T()) / 2  # ns
-                        edep = depo.GetEnergyDeposit()  # MeV
+        if trig != 1:
+            return np.zeros((0, 5))
+        lineage = self.neutron
+        return np.column_stack([lineage.points, lineage.edep])
         
    #here we face a problem, in every track there are multiple points, in simulating_direction we just pick up a random one for simulation
     def reconstructing_direction(self, start=0, stop=-1):
-        coordinate = []
         trig = self.selectneutronevent()
-        mm2cm=0.1
-        if trig == 1:
-            for i in range(self.tracks.size):
-                track_origin = self.tracks[i]
-                track= self.tracks[i]
-                pdg_original = track.GetPDGCode()
-                pdg = track.GetPDGCode()  # Get the PDG code of the particle
-                track_energy = track.energy.get('depoTotal', 0)
-                # Trace back to the parent particle until we find a neutron (PDG code 2112)
-                pdg, track = self.loopover(pdg, track)
-                ParentId = track.GetParentId()
-                while pdg == 2112 and ParentId != -1:
-                    track = self.tracks[ParentId]
-                    pdg = track.GetPDGCode()
-                    pdg, track = self.loopover(pdg, track)
-                    ParentId = track.GetParentId()
-                if pdg == 2112 and ParentId == -1 :
-                    depoList = track_origin.association['depoList']
-                    for di in depoList:
-                        if di < 0 or di >= len(self.depos):
-                            continue  # 防止越界
-
-                        depo = self.depos[di]
-                        x = (depo.GetStart().X() + depo.GetStop().X()) / 2 * mm2cm
-                        y = (depo.GetStart().Y() + depo.GetStop().Y()) / 2 * mm2cm
-                        z = (depo.GetStart().Z() + depo.GetStop().Z()) / 2 * mm2cm
-                        t = (depo.GetStart().T() + depo.GetStop().T()) / 2  # ns
-                        edep = depo.GetEnergyDeposit()  # MeV
-                        l = depo.GetTrackLength() * mm2cm
-
-                        if edep >= 0.5:
-                            coordinate.append([0.0, x, y, z, t, edep])
+        if trig != 1:
+            return []
+        lineage = self.neutron
+        keep = lineage.edep >= 0.5
+        coordinate = np.column_stack([np.zeros(keep.sum()), lineage.points[keep], lineage.edep[keep]])
         #print(coordinate)
-        return coordinate
+        return coordinate.tolist()
     def reconstructed_direction(self):
         """
         Calculate the reconstructed direction vector based on data from simulating_direction().
@@ -948,23 +860,13 @@ class Event:
             print("No data from reconstructing_direction(), returning None.")
             return None
     
-        weighted_vectors = []
-        for pt in data:
-            try:
-                weight = pt[5]
-            except IndexError:
-                print("Point data does not contain index 5 (weight), returning None.")
-                return None
-            vector = (-pt[1] * weight, -pt[2] * weight, -pt[3] * weight)
-            weighted_vectors.append(vector)
-
-    # Sum the weighted vectors component-wise
-        sum_vector = [sum(vec[i] for vec in weighted_vectors) for i in range(3)]
-        norm = math.sqrt(sum(sum_component ** 2 for sum_component in sum_vector))
+        data = np.asarray(data)
+        sum_vector = -np.sum(data[:, 1:4] * data[:, 5:6], axis=0)
+        norm = np.sqrt(np.sum(sum_vector**2))
         if norm == 0:
             print("Weighted vector sum has zero magnitude, skipping this event.")
             return None
-        unit_vector = [x / norm for x in sum_vector]
+        unit_vector = list(sum_vector / norm)
         return unit_vector
     
 
@@ -972,16 +874,8 @@ class Event:
     
     
     def selectneutronevent(self):
-        trig = 0
-        for i in range(self.tracks.size):
-            track = self.tracks[i]
-            pdg_original = track.GetPDGCode()
-            pdg = track.GetPDGCode()  # Get the PDG code of the particle
-            track_energy = track.energy.get('depoTotal', 0)
-            # Trace back to the parent particle until we find a neutron (PDG code 2112)
-            ParentId = track.GetParentId()
-            if pdg == 2112 and ParentId == -1:
-                trig+=1
+        # number of primary neutrons
+        trig = self.neutron.primaries.size
         if trig==1:
             print("this",self.currentEntry,"th event has one neutron neutrino interaction, it is a good event")
         elif trig!=0 and trig!=1:
@@ -997,29 +891,13 @@ class Event:
             return
         else:
             print("this event has neutron neutrino interaction")
-            i=0
-            track = self.tracks[i]
-            parId = track.GetParentId()
-            pdg_original = track.GetPDGCode()
-            while parId !=-1 or pdg_original != 2112:
-                i+=1
-                track=self.tracks[i]
-                parId = track.GetParentId()
-                pdg_original=track.GetPDGCode()
-        
-            px = track.GetInitialMomentum().X()
-            py = track.GetInitialMomentum().Y()
-            pz = track.GetInitialMomentum().Z()
-            pE = track.GetInitialMomentum().E()
-            pM = track.GetInitialMomentum().M()
-            p_square = (px ** 2 + py ** 2 + pz ** 2) ** 0.5
+            i = self.neutron.primaries[0]
+            p = self.tracks.momentum[i, :3]
+            p_square = np.sqrt(np.sum(p**2))
             if p_square==0.0:
                 direction_vector = np.array([0.0,0.0,0.0])
             else:
-                direction_vector.append(px / p_square)
-                direction_vector.append(py / p_square)
-                direction_vector.append(pz / p_square)
-                direction_vector = np.array(direction_vector)
+                direction_vector = p / p_square
         #print("the direction of the neutron:",direction_vector) 
         return direction_vector
 
@@ -1039,83 +917,42 @@ class Event:
             self.currentEntry = self.nEntry -1
         self.Jump(self.currentEntry)
 
+    #-------------------------
+    def GetDepoWithDesendents(self, trkId, key):
+        # quantity key summed over the track and all its descendants
+        return self.tracks.DepoWithDesendents(key)[trkId]
+
     #-------------------------
     def GetEnergyDepoWithDesendents(self, trkId):
-        track = self.tracks[trkId]
-        energy = track.energy['depoTotal']
-        children = track.association['children']
-        for childId in children:
-            energy += self.GetEnergyDepoWithDesendents(childId)
-        return energy
+        return self.GetDepoWithDesendents(trkId, 'depoTotal')
 
     #-------------------------
     def GetChargeDepoWithDesendents(self, trkId):
-        track = self.tracks[trkId]
-        charge = track.energy['depoTotal_charge']
-        charge_75keV = track.energy['depoTotal_charge_th_75keV']
-        charge_500keV = track.energy['depoTotal_charge_th_500keV']
-        children = track.association['children']
-        for childId in children:
-            charge += self.GetChargeDepoWithDesendents(childId)[0]
-            charge_75keV += self.GetChargeDepoWithDesendents(childId)[1]
-            charge_500keV += self.GetChargeDepoWithDesendents(childId)[2]
-        return [charge, charge_75keV, charge_500keV]
+        # the charge, then one entry per dQ threshold in self.thresholds
+        return [self.GetDepoWithDesendents(trkId, 'depoTotal_charge')] + \
+               [self.GetDepoWithDesendents(trkId, 'depoTotal_charge_th_' + label) for label in self.thresholds]
 
     #-------------------------
     def GetChargeMBoxDepoWithDesendents(self, trkId):
-        track = self.tracks[trkId]
-        charge = track.energy['depoTotal_charge_MBox']
-        charge_75keV = track.energy['depoTotal_charge_MBox_th_75keV']
-        charge_500keV = track.energy['depoTotal_charge_MBox_th_500keV']
-        children = track.association['children']
-        for childId in children:
-            charge += self.GetChargeMBoxDepoWithDesendents(childId)[0]
-            charge_75keV += self.GetChargeMBoxDepoWithDesendents(childId)[1]
-            charge_500keV += self.GetChargeMBoxDepoWithDesendents(childId)[2]
-        return [charge, charge_75keV, charge_500keV]
+        # the charge, then one entry per dQ threshold in self.thresholds
+        return [self.GetDepoWithDesendents(trkId, 'depoTotal_charge_MBox')] + \
+               [self.GetDepoWithDesendents(trkId, 'depoTotal_charge_MBox_th_' + label) for label in self.thresholds]
 
     #-------------------------
     def GetLightDepoWithDesendents(self, trkId):
-        track = self.tracks[trkId]
-        light_avg_220PEpMeV = track.energy['depoTotal_light_avg_220PEpMeV']
-        light_avg_180PEpMeV = track.energy['depoTotal_light_avg_180PEpMeV']
-        light_avg_140PEpMeV = track.energy['depoTotal_light_avg_140PEpMeV']
-        light_avg_100PEpMeV = track.energy['depoTotal_light_avg_100PEpMeV']
-        light_avg_35PEpMeV = track.energy['depoTotal_light_avg_35PEpMeV']
-        children = track.association['children']
-        for childId in children:
-            light_avg_220PEpMeV += self.GetLightDepoWithDesendents(childId)[0]
-            light_avg_180PEpMeV += self.GetLightDepoWithDesendents(childId)[1]
-            light_avg_140PEpMeV += self.GetLightDepoWithDesendents(childId)[2]
-            light_avg_100PEpMeV += self.GetLightDepoWithDesendents(childId)[3]
-            light_avg_35PEpMeV  += self.GetLightDepoWithDesendents(childId)[4]
-        return [light_avg_220PEpMeV, light_avg_180PEpMeV, light_avg_140PEpMeV, light_avg_100PEpMeV, light_avg_35PEpMeV]
+        # one entry per light yield in self.light.lightYields
+        return [self.GetDepoWithDesendents(trkId, 'depoTotal_light_' + LightLabel(ly))
+                for ly in self.light.lightYields]
 
     #-------------------------
     def GetLightMBoxDepoWithDesendents(self, trkId):
-        track = self.tracks[trkId]
-        light_avg_220PEpMeV = track.energy['depoTotal_light_avg_220PEpMeV_MBox']
-        light_avg_180PEpMeV = track.energy['depoTotal_light_avg_180PEpMeV_MBox']
-        light_avg_140PEpMeV = track.energy['depoTotal_light_avg_140PEpMeV_MBox']
-        light_avg_100PEpMeV = track.energy['depoTotal_light_avg_100PEpMeV_MBox']
-        light_avg_35PEpMeV  = track.energy['depoTotal_light_avg_35PEpMeV_MBox']
-        children = track.association['children']
-        for childId in children:
-            light_avg_220PEpMeV += self.GetLightMBoxDepoWithDesendents(childId)[0]
-            light_avg_180PEpMeV += self.GetLightMBoxDepoWithDesendents(childId)[1]
-            light_avg_140PEpMeV += self.GetLightMBoxDepoWithDesendents(childId)[2]
-            light_avg_100PEpMeV += self.GetLightMBoxDepoWithDesendents(childId)[3]
-            light_avg_35PEpMeV  += self.GetLightMBoxDepoWithDesendents(childId)[4]
-        return [light_avg_220PEpMeV, light_avg_180PEpMeV, light_avg_140PEpMeV, light_avg_100PEpMeV, light_avg_35PEpMeV]
+        # one entry per light yield in self.light.lightYields
+        return [self.GetDepoWithDesendents(trkId, 'depoTotal_light_' + LightLabel(ly) + '_MBox')
+                for ly in self.light.lightYields]
 
     #-------------------------
     """def GetEnergyDepoWithAncestor(self, acId):
-        energy = 0
-        for track in self.tracks:
-            ancestor = track.association['ancestor']
-            if ancestor == acId:
-                energy += track.energy['depoTotal']
-        return energy"""
+        return np.sum(self.tracks.Depo('depoTotal')[self.tracks.ancestor == acId])"""
 
     #-----------------------
     def GetEnuFromFileName(self):
@@ -1136,21 +973,20 @@ class Event:
 
     #-----------------------
     def GetFileName(self):
+        self.LoadEntry()
         return self.simTree.GetFile().GetName()
    
     def GetDepoInformation_all_events(self):
         """
         Returns a list of track lengths (in centimeters) for deposits across all events.
-        Assumes mm2cm is defined (e.g., mm2cm = 0.1).
         """
+        mm2cm = 0.1
         all_track_lengths = []
         # Loop over all events
         for i in range(self.nEntry):
             self.Jump(i)  # Load event i
-            # Now self.depos contains deposits for the current event
-            for depo in self.depos:
-                trkLength = depo.GetTrackLength() * mm2cm
-                all_track_lengths.append(trkLength)
+            # Now self.depo contains deposits for the current event
+            all_track_lengths.extend((self.depo['length'] * mm2cm).tolist())
         return all_track_lengths
 
 # ------------------------
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Extent of the depos of an event: the spread of their times, in O(n), and the
+# largest distance between two of them, exact, as a blocked and vectorised
+# pairwise max: still O(n^2) in the worst case, in bounded memory.
+# A batch of events is given as concatenated columns and CSR offsets ptr,
+# the depos of event k being rows ptr[k]:ptr[k+1].
+
+BLOCK = 512 # rows of the pairwise difference blocks, BLOCK**2 * 3 doubles at most
+
+# ------------------------
+def MaxTimeSpread(t):
+    # max |t_i - t_j|
+    return float(np.ptp(t)) if len(t) > 1 else 0.0
+
+# ------------------------
+def MaxNorm(points):
+    # max |p_i| of (n, 3) points, 0 if there is none
+    if len(points) == 0:
+        return 0.0
+    return float(np.sqrt(np.max(np.sum(np.asarray(points, dtype=float)**2, axis=1))))
+
+# ------------------------
+def MaxDistance(points, block=BLOCK):
+    # max |p_i - p_j| of (n, 3) points, pairwise over blocks of the candidates
+    # left by a centroid bound: fewer pairs in practice, O(n^2) at worst
+    points = np.asarray(points, dtype=float)
+    if len(points) < 2:
+        return 0.0
+    center = points.mean(axis=0)
+    r = np.sqrt(np.sum((points - center)**2, axis=1))
+    # lower bound: distance from the point the farthest from the center to the
+    # point the farthest from it
+    far = points[np.argmax(r)]
+    best = np.max(np.sum((points - far)**2, axis=1))
+    # a point can only be an end of a longer pair if r + max(r) reaches the bound
+    candidates = points[r + r.max() >= np.sqrt(best)]
+    for k in range(0, len(candidates), block):
+        a = candidates[k:k+block]
+        for l in range(k, len(candidates), block):
+            b = candidates[l:l+block]
+            d2 = np.sum((a[:, None, :] - b[None, :, :])**2, axis=2)
+            best = max(best, d2.max())
+    return float(np.sqrt(best))
+
+# ------------------------
+def EventExtents(points, t, ptr, block=BLOCK):
+    # (n_events,) max distance and max time spread of a batch of events
+    ptr = np.asarray(ptr)
+    counts = np.diff(ptr)
+    maxdt = np.zeros(counts.size)
+    filled = counts > 0
+    if np.any(filled):
+        starts = ptr[:-1][filled]
+        maxdt[filled] = np.maximum.reduceat(t, starts) - np.minimum.reduceat(t, starts)
+    maxdr = np.array([MaxDistance(points[ptr[k]:ptr[k+1]], block) for k in range(counts.size)])
+    return maxdr, maxdt
@@ -0,0 +1,184 @@
+import os
+import numpy as np
+
+# Synthetic edep-sim files for the benchmarks, written with the real TG4Event
+# classes so that Event reads them like simulated ones, without access to the
+# production samples.
+# Each event has three primaries (e-, neutron, proton) at the origin and
+# secondaries spread evenly over their showers, so that a third of the tracks
+# form a neutron-induced shower. Every track is a straight line with 3
+# trajectory points, and the segments of the SimEnergyDeposit detector are
+# spread along the tracks. Names follow the Marley convention
+# (<prefix>_nue_10MeV_<size>.root) for Event(..., 'Marley').
+# SyntheticEvent only needs numpy, ROOT is imported to write the files.
+
+# event sizes: (tracks, segments)
+SIZES = {
+    'small' : (30, 400),
+    'medium': (300, 5000),
+    'large' : (3000, 50000),
+}
+
+PRIMARY_PDG = [11, 2112, 2212]
+SECONDARY_PDG = [22, 2212, 2112, 11]
+SECONDARY_PROB = [0.5, 0.25, 0.15, 0.1]
+MASS = {11: 0.511, 22: 0., 2112: 939.565, 2212: 938.272} # MeV
+NAME = {11: 'e-', 22: 'gamma', 2112: 'neutron', 2212: 'proton'}
+REACTION = 'nu:12;tgt:1000180400;N:2112;proc:Weak[CC],QES;'
+N_POINTS = 3 # trajectory points per track: start, middle, end
+
+# copies one synthetic event from flat buffers into the trajectories and the
+# SimEnergyDeposit segments of a TG4Event
+_helperCode = r'''
+#include "TDatabasePDG.h"
+namespace pyedep {
+void FillSyntheticEvent(TG4Event& event, int nTracks, const int* parentId, const int* pdg,
+                        const double* momentum, int nPoints, const double* points,
+                        long nSegs, const int* segTrk, const int* segPrimary, const double* edep,
+                        const double* length, const double* start, const double* stop) {
+    event.Trajectories.clear();
+    for (int i = 0; i < nTracks; ++i) {
+        TG4Trajectory traj;
+        traj.TrackId = i;
+        traj.ParentId = parentId[i];
+        traj.PDGCode = pdg[i];
+        TParticlePDG* particle = TDatabasePDG::Instance()->GetParticle(pdg[i]);
+        traj.Name = particle ? particle->GetName() : "unknown";
+        traj.InitialMomentum.SetPxPyPzE(momentum[4*i], momentum[4*i+1], momentum[4*i+2], momentum[4*i+3]);
+        for (int k = 0; k < nPoints; ++k) {
+            const double* p = points + 4*(i*nPoints + k);
+            TG4TrajectoryPoint point;
+            point.Position.SetXYZT(p[0], p[1], p[2], p[3]);
+            traj.Points.push_back(point);
+        }
+        event.Trajectories.push_back(traj);
+    }
+    std::vector<TG4HitSegment>& segs = event.SegmentDetectors["SimEnergyDeposit"];
+    segs.clear();
+    segs.reserve(nSegs);
+    for (long j = 0; j < nSegs; ++j) {
+        TG4HitSegment seg;
+        seg.Contrib.push_back(segTrk[j]);
+        seg.PrimaryId = segPrimary[j];
+        seg.EnergyDeposit = edep[j];
+        seg.TrackLength = length[j];
+        seg.Start.SetXYZT(start[4*j], start[4*j+1], start[4*j+2], start[4*j+3]);
+        seg.Stop.SetXYZT(stop[4*j], stop[4*j+1], stop[4*j+2], stop[4*j+3]);
+        segs.push_back(seg);
+    }
+}
+}
+'''
+
+_helperReady = None
+
+# ------------------------
+def IsotropicDirections(rng, n):
+    cosTheta = rng.uniform(-1, 1, n)
+    phi = rng.uniform(0, 2*np.pi, n)
+    sinTheta = np.sqrt(1 - cosTheta**2)
+    return np.column_stack([sinTheta*np.cos(phi), sinTheta*np.sin(phi), cosTheta])
+
+# ------------------------
+def SyntheticEvent(rng, nTracks, nSegments):
+    # flat arrays of one event, with the columns of TrackTable and ReadSegments
+    nTracks = max(nTracks, len(PRIMARY_PDG))
+    nPrimary = len(PRIMARY_PDG)
+    # track i descends from primary i % nPrimary, through a random earlier
+    # track of the same primary
+    trkId = np.arange(nTracks)
+    primary = trkId % nPrimary
+    parentId = np.full(nTracks, -1, dtype=np.int32)
+    secondary = trkId[nPrimary:]
+    parentId[nPrimary:] = primary[nPrimary:] + nPrimary * (rng.random(secondary.size) * (secondary // nPrimary)).astype(np.int32)
+    pdg = np.empty(nTracks, dtype=np.int32)
+    pdg[:nPrimary] = PRIMARY_PDG
+    pdg[nPrimary:] = rng.choice(SECONDARY_PDG, nTracks - nPrimary, p=SECONDARY_PROB)
+
+    mass = np.array([MASS[p] for p in pdg])
+    KE = rng.exponential(np.where(parentId == -1, 10., 1.))
+    direction = IsotropicDirections(rng, nTracks)
+    p = np.sqrt(KE**2 + 2*KE*mass)
+    momentum = np.column_stack([direction * p[:, None], KE + mass])
+
+    # straight tracks [mm], neutrons go further and live longer [ns]
+    isNeutron = pdg == 2112
+    trackLength = rng.exponential(np.where(isNeutron, 300., 10.))
+    duration = rng.exponential(np.where(isNeutron, 2e5, 1.))
+    begin = np.zeros((nTracks, 4))
+    for i in range(nPrimary, nTracks):
+        begin[i] = begin[parentId[i]] + rng.random() * np.append(direction[parentId[i]] * trackLength[parentId[i]],
+                                                                   duration[parentId[i]])
+    step = np.column_stack([direction * trackLength[:, None], duration])
+    points = begin[:, None, :] + np.linspace(0, 1, N_POINTS)[None, :, None] * step[:, None, :]
+
+    # segments along the tracks, in track order
+    segTrk = np.sort(rng.integers(0, nTracks, nSegments)).astype(np.int32)
+    where = rng.random((nSegments, 1))
+    size = np.minimum(rng.exponential(2., (nSegments, 1)), 5.) / np.maximum(trackLength[segTrk, None], 1e-3)
+    start = begin[segTrk] + where * step[segTrk]
+    stop = start + size * step[segTrk]
+    length = np.linalg.norm(stop[:, :3] - start[:, :3], axis=1)
+    # about 2 MeV/cm with Landau-like fluctuations
+    edep = 0.2 * length * rng.gamma(2., 0.5, nSegments)
+    return {
+        'parentId': parentId, 'pdg': pdg, 'momentum': momentum, 'points': points,
+        'segTrk': segTrk, 'segPrimary': primary[segTrk].astype(np.int32),
+        'edep': edep, 'length': length, 'start': start, 'stop': stop,
+    }
+
+# ------------------------
+def FillVertex(event, data):
+    # the primaries of the event, with a Marley-like reaction string
+    import ROOT
+    vertex = ROOT.TG4PrimaryVertex()
+    vertex.Reaction = REACTION
+    vertex.CrossSection = 1e-41
+    for i in np.flatnonzero(data['parentId'] == -1):
+        particle = ROOT.TG4PrimaryParticle()
+        particle.TrackId = int(i)
+        particle.PDGCode = int(data['pdg'][i])
+        particle.Name = NAME[int(data['pdg'][i])]
+        particle.Momentum = ROOT.TLorentzVector(*(float(x) for x in data['momentum'][i]))
+        vertex.Particles.push_back(particle)
+    event.Primaries.clear()
+    event.Primaries.push_back(vertex)
+
+# ------------------------
+def WriteFixture(fileName, nEvents, nTracks, nSegments, seed=0):
+    global _helperReady
+    import ROOT
+    from ROOT import TG4Event, TFile, TTree
+    if _helperReady is None:
+        _helperReady = bool(ROOT.gInterpreter.Declare(_helperCode))
+    if not _helperReady:
+        raise RuntimeError("fixtures: could not compile the C++ helper, is the edep-sim io library loaded?")
+    rng = np.random.default_rng(seed)
+    f = TFile(fileName, 'RECREATE')
+    tree = TTree('EDepSimEvents', 'EDepSimEvents')
+    event = TG4Event()
+    tree.Branch('Event', event)
+    for i in range(nEvents):
+        data = SyntheticEvent(rng, nTracks, nSegments)
+        event.RunId = 0
+        event.EventId = i
+        FillVertex(event, data)
+        ROOT.pyedep.FillSyntheticEvent(event, data['pdg'].size, data['parentId'], data['pdg'],
+                                       np.ascontiguousarray(data['momentum']), N_POINTS,
+                                       np.ascontiguousarray(data['points']),
+                                       data['segTrk'].size, data['segTrk'], data['segPrimary'], data['edep'],
+                                       data['length'], np.ascontiguousarray(data['start']),
+                                       np.ascontiguousarray(data['stop']))
+        tree.Fill()
+    tree.Write()
+    f.Close()
+
+# ------------------------
+def Fixture(directory, size, nEvents, seed=0):
+    # path of the fixture of the given SIZES entry, written if not there yet
+    os.makedirs(directory, exist_ok=True)
+    fileName = os.path.join(directory, f'bench{nEvents}s{seed}_nue_10MeV_{size}.root')
+    if not os.path.exists(fileName):
+        WriteFixture(fileName + '.tmp', nEvents, *SIZES[size], seed=seed)
+        os.replace(fileName + '.tmp', fileName)
+    return fileName
@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 import sys
 import ROOT
-from event_alpha1 import Event  # Ensure that your event module is available
+import numpy as np
+from event import Event
 
 def main(input_filename, output_filename):
     # Initialize the event object.
@@ -12,14 +13,14 @@ def main(input_filename, output_filename):
                      "AngleDifferenceHist;angle(in degrees);Events",
                      180, 0, 180)
 
-    # Loop over all events in the file
-    for i in range(evt.nEntry):
-        evt.Jump(i)
-        angle = evt.cos_theta()  # your newly added method
-        if angle is not None:
-            hist.Fill(angle)
-        else:
-            print(f"Warning: cos_theta() returned None for event {i}")
+    # cos_theta of all events in the file, in one pass
+    records = evt.NeutronDirections()
+    valid = np.isfinite(records['cos'])
+    angle = np.ascontiguousarray(records['cos'][valid])
+    if angle.size:
+        hist.FillN(angle.size, angle, np.ones(angle.size))
+    if not valid.all():
+        print(f"Warning: cos_theta() returned None for {np.count_nonzero(~valid)} events")
 
     # Fit the histogram with a Gaussian
     # "Q" = quiet, "S" = return fit result
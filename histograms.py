@@ -0,0 +1,78 @@
+import numpy as np
+
+# Fixed-binning histograms filled event after event in constant memory, for
+# distributions over many events (e.g. Plotter.Fill). Histograms filled in
+# separate processes are added with Merge and drawn once at the end.
+
+class Histogram:
+    # uniform bins over [low, high], the last bin including high as np.histogram;
+    # values outside (and inf) are counted in underflow / overflow, NaN are dropped
+
+    def __init__(self, bins, limits, xlabel='', log=False):
+        self.edges = np.linspace(limits[0], limits[1], bins + 1)
+        self.counts = np.zeros(bins)
+        self.underflow = 0.
+        self.overflow = 0.
+        self.xlabel = xlabel
+        self.log = log
+
+    # ------------------------
+    def Fill(self, values, weights=None):
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float).ravel()
+        low, high = self.edges[0], self.edges[-1]
+        bins = self.counts.size
+        inside = (values >= low) & (values <= high)
+        idx = ((values[inside] - low) * (bins / (high - low))).astype(np.int64)
+        np.minimum(idx, bins - 1, out=idx)
+        self.counts += np.bincount(idx, weights=weights[inside], minlength=bins)
+        self.underflow += weights[values < low].sum()
+        self.overflow += weights[values > high].sum()
+
+    # ------------------------
+    def Merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("cannot merge histograms with different binnings")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    # ------------------------
+    def Draw(self, fileName):
+        import matplotlib.pyplot as plt
+        plt.stairs(self.counts, self.edges, fill=True)
+        plt.xlabel(self.xlabel)
+        if self.log:
+            plt.yscale("log")
+        plt.draw()
+        plt.savefig(fileName)
+        plt.clf() # important to clear figure
+        plt.close()
+
+class HistogramSet:
+    # named histograms, e.g. from Plotter.Histograms()
+    #   spec: {name: (bins, limits, xlabel, log)}
+
+    def __init__(self, spec):
+        self.hists = {name: Histogram(*args) for name, args in spec.items()}
+
+    # ------------------------
+    def __getitem__(self, name):
+        return self.hists[name]
+
+    # ------------------------
+    def Fill(self, name, values, weights=None):
+        self.hists[name].Fill(values, weights)
+
+    # ------------------------
+    def Merge(self, other):
+        for name, hist in other.hists.items():
+            self.hists[name].Merge(hist)
+        return self
+
+    # ------------------------
+    def Save(self, plotpath, suffix='all_evts'):
+        # one pdf per histogram: <plotpath>/<name>_<suffix>.pdf
+        for name, hist in self.hists.items():
+            hist.Draw('%s/%s_%s.pdf' % (plotpath, name, suffix))
@@ -0,0 +1,62 @@
+import numpy as np
+
+# Photon statistics smearing of the light deposit.
+# how the light yield is actually derived: 25k photons / MeV are simualted and 220 on average are detected
+# the overall photon collection efficiency (PCE) is
+#    220/21622=1.0% PCE
+#    180/21622=0.83% PCE
+#    140/21622=0.65% PCE
+#    100/21622=0.46% PCE
+#    35/21622=0.16% PCE
+# Birks:  (dL/W_ph)*PCE = (dL/19.5eV)*PCE = number of photons
+# MBox:   dL*LY = number of photons
+# The detected number of PE is smeared and converted back to MeV.
+
+W_PH = 19.5e-6 # MeV per scintillation photon
+N_PH = 21622   # photons/MeV used to turn a light yield into a PCE
+LIGHT_YIELDS = [220, 180, 140, 100, 35] # PE/MeV
+PCE = {220: 0.01, 180: 0.0083, 140: 0.0065, 100: 0.0046, 35: 0.0016}
+
+# ------------------------
+def LightLabel(ly):
+    # e.g. 220 -> 'avg_220PEpMeV', used in the track and info keys
+    return 'avg_%gPEpMeV' % ly
+
+class LightSmearing:
+
+    def __init__(self, lightYields=LIGHT_YIELDS, seed=0, fluctuation='gauss'):
+        if fluctuation not in ('gauss', 'poisson'):
+            raise ValueError(f"Unknown PE fluctuation model: {fluctuation}")
+        self.lightYields = list(lightYields)
+        self.seed = seed
+        self.fluctuation = fluctuation
+        # PE per MeV of light deposit for each light yield
+        self.scaleBirks = np.array([PCE.get(ly, ly/N_PH)/W_PH for ly in self.lightYields])
+        self.scaleMBox = np.array(self.lightYields, dtype=float)
+
+    # ------------------------
+    def Generator(self, entryNo):
+        # one independent stream per (seed, entry): reprocessing an entry gives the
+        # same light, whatever worker or order it is processed in
+        return np.random.default_rng([self.seed, entryNo])
+
+    # ------------------------
+    def Smear(self, Ldep, Ldep_MBox, entryNo):
+        # Ldep, Ldep_MBox: (n_depo,) light deposits [MeV] with Birks / Modified Box charge
+        # returns two (n_depo, n_LY) arrays of detected light [MeV]
+        scale = np.concatenate((self.scaleBirks, self.scaleMBox))
+        nLY = len(self.lightYields)
+        nPE = np.empty((Ldep.size, 2*nLY))
+        nPE[:, :nLY] = Ldep[:, None]*self.scaleBirks
+        nPE[:, nLY:] = Ldep_MBox[:, None]*self.scaleMBox
+        # the recombination models are 0/0 for depos without energy or length:
+        # no PE for those, instead of NaN sums (gauss) or a ValueError (poisson)
+        nPE[~np.isfinite(nPE)] = 0
+
+        rng = self.Generator(entryNo)
+        if self.fluctuation == 'gauss':
+            detected = rng.normal(nPE, np.sqrt(nPE))
+        else:
+            detected = rng.poisson(nPE).astype(float)
+        detected /= scale
+        return detected[:, :nLY], detected[:, nLY:]
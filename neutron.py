@@ -0,0 +1,101 @@
+import numpy as np
+from functools import cached_property
+from segments import MidPoints
+
+NEUTRON = 2112
+mm2cm = 0.1
+
+class NeutronLineage:
+    # Tracks of an event descending from a primary neutron, labelled once per
+    # entry from the track table and shared by the neutron methods of Event.
+    #   fromNeutron : (n_tracks,) the primary the track descends from is a neutron
+    #   primaries   : primary neutrons (no parent, pdg 2112)
+    #   tracks      : tracks with fromNeutron set
+    # and from the depos, when first used:
+    #   energy      : (n_tracks,) energy deposited by each track itself [MeV]
+    #   selected    : tracks from a neutron depositing more than 0.5 MeV themselves
+    #   lastNeutron : the last neutron among them, -1 if none
+    #   depoIdx     : depos of the tracks from a neutron, track after track
+    #   points      : (n, 4) mid points of these depos: X, Y, Z [cm], T [ns]
+    #   edep        : (n,) energy of these depos [MeV]
+
+    def __init__(self, tracks, readDepo):
+        # readDepo: returns the depo columns of the same entry, called when needed
+        self.table = tracks
+        self.readDepo = readDepo
+        self.fromNeutron = tracks.primaryPdg == NEUTRON
+        self.primaries = np.flatnonzero((tracks.parentId == -1) & (tracks.pdg == NEUTRON))
+        self.tracks = np.flatnonzero(self.fromNeutron)
+
+    # ------------------------
+    @cached_property
+    def energy(self):
+        return self.table.Depo('depoTotal')
+
+    @cached_property
+    def selected(self):
+        return self.tracks[self.energy[self.tracks] > 0.5]
+
+    @cached_property
+    def lastNeutron(self):
+        neutrons = self.selected[self.table.pdg[self.selected] == NEUTRON]
+        return int(neutrons[-1]) if neutrons.size > 0 else -1
+
+    @cached_property
+    def depoIdx(self):
+        table = self.table
+        table.RequireDepos()
+        # the CSR depo lists of the tracks, kept for the tracks from a neutron
+        return table.depoIdx[np.repeat(self.fromNeutron, np.diff(table.depoPtr))]
+
+    @cached_property
+    def points(self):
+        mid = MidPoints(self.readDepo())[self.depoIdx]
+        mid[:, :3] *= mm2cm
+        return mid
+
+    @cached_property
+    def edep(self):
+        return self.readDepo()['edep'][self.depoIdx]
+
+# ------------------------
+# Event.NeutronDirections: per entry, the number of primary neutrons, the
+# reconstructed and true neutron directions and the cosine between them, NaN
+# where cos_theta gives None
+DIRECTION_DTYPE = np.dtype([('entry', 'i8'), ('nPrimary', 'i4'),
+                            ('reco', 'f8', (3,)), ('true', 'f8', (3,)), ('cos', 'f8')])
+
+# Event.NeutronCaptures: per entry, the last neutron of the lineage (as in
+# Event.PrintTracks) and the final point of its trajectory, taken as the capture:
+# trkId -1 and NaN if there is no such neutron
+CAPTURE_DTYPE = np.dtype([('entry', 'i8'), ('trkId', 'i4'), ('KE', 'f8'),
+                          ('time', 'f8'), ('position', 'f8', (3,))])  # MeV, ns, mm
+
+# ------------------------
+def UnitVectors(v):
+    # rows of v normalized, NaN for the null rows
+    norm = np.sqrt(np.sum(v**2, axis=1, keepdims=True))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(norm > 0, v / norm, np.nan)
+
+# ------------------------
+def DirectionRecords(entries, nPrimary, momentum, depoEntry, weighted):
+    # entries, nPrimary : (n,)
+    # momentum          : (n, 3) initial momentum of the primary neutron
+    # depoEntry         : (m,) row in entries of each selected depo
+    # weighted          : (m, 3) its position times its energy
+    n = len(entries)
+    records = np.zeros(n, dtype=DIRECTION_DTYPE)
+    records['entry'] = entries
+    records['nPrimary'] = nPrimary
+    sums = np.column_stack([np.bincount(depoEntry, weights=weighted[:, c], minlength=n) for c in range(3)])
+    # opposite to the energy-weighted centroid, as in Event.reconstructed_direction
+    reco = UnitVectors(-sums)
+    true = UnitVectors(np.asarray(momentum, dtype=float).reshape(n, 3))
+    single = records['nPrimary'] == 1
+    reco[~single] = np.nan
+    true[~single] = np.nan
+    records['reco'] = reco
+    records['true'] = true
+    records['cos'] = np.einsum('ij,ij->i', reco, true)
+    return records
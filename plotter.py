@@ -3,7 +3,21 @@ import sys
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-import math
+from extent import MaxDistance, MaxTimeSpread, MaxNorm
+from histograms import HistogramSet
+from display import DisplayRenderer, DisplayFileName
+from segments import MidPoints
+
+# histograms of the hist_* methods and of evt_maxdtdr, filled across events by
+# Plotter.Fill: {name: (bins, limits, xlabel, log)}
+HISTOGRAMS = {
+    'dE_dx'               : (100, (0, 6),   'dE/dx [MeV/cm]',    False),
+    'LowE_dE_dx'          : (500, (0, 30),  'dE/dx [MeV/cm]',    False),
+    'single_edep_dx'      : (100, (0, 4),   'dx [cm]',           False),
+    'primary_track_length': (100, (0, 6),   'track length [cm]', True),
+    'edeps_max_dr'        : (100, (0, 200), 'edeps max dr [cm]', True),
+    'edeps_max_dt'        : (50,  (0, 50),  'edeps max dt [ns]', True),
+}
 
 class Plotter:
 
@@ -13,49 +27,25 @@ class Plotter:
         #self.Jump(0, 0.5)
 
     def Collect(self, dQthreshold):
-        self.xx = np.array([])
-        self.yy = np.array([])
-        self.zz = np.array([])
-        self.cc = np.array([])
-        self.tt = np.array([])
-        self.ee = np.array([])
-        self.ll = np.array([])
-
         self.USER_COLORS = ['black', 'red', 'blue', 'magenta']
 
         nColor = len(self.USER_COLORS)
-        mm2m = 0.001
-        mm2cm = 0.1
-        for i, track in enumerate(self.event.tracks):
-            track_origin = track
-            pdg = track.GetPDGCode()
-            ParentId = track.GetParentId()
-            while pdg != 2112 and ParentId != -1:
-                    track = self.tracks[ParentId]
-                    pdg = track.GetPDGCode()
-                    pdg, track = self.loopover(pdg, track)
-                    ParentId = track.GetParentId()
-            if pdg==2112 and ParentId==-1:
-                depoList = track_origin.association['depoList']
-                ancestor = track_origin.association['ancestor']
-            
-            
-            for di in depoList:
-                depo = self.event.depos[di]
-                x = (depo.GetStart().X() + depo.GetStop().X()) / 2 * mm2m
-                y = (depo.GetStart().Y() + depo.GetStop().Y()) / 2 * mm2m
-                z = (depo.GetStart().Z() + depo.GetStop().Z()) / 2 * mm2m
-                t = (depo.GetStart().T() + depo.GetStop().T()) / 2 # ns
-                e = depo.GetEnergyDeposit() # MeV
-                l = depo.GetTrackLength() *mm2cm # most are 0.5 cm
-                if self.event.ChargeBirksLaw(e, l) > dQthreshold: # detector threshold
-                    self.xx = np.append(self.xx, x)
-                    self.yy = np.append(self.yy, y)
-                    self.zz = np.append(self.zz, z)
-                    self.tt = np.append(self.tt, t)
-                    self.ee = np.append(self.ee, e)
-                    self.ll = np.append(self.ll, l)
-                    self.cc = np.append(self.cc, self.USER_COLORS[ancestor % nColor])
+        cm2m = 0.01
+        self.event.Require('charge')
+        depo = self.event.depo
+        # only tracks whose primary ancestor is a neutron, their depos track after track
+        lineage = self.event.neutron
+        keep = depo['Qdep'][lineage.depoIdx] > dQthreshold # detector threshold
+        idx = lineage.depoIdx[keep]
+        points = lineage.points[keep]
+        self.xx = points[:, 0] * cm2m
+        self.yy = points[:, 1] * cm2m
+        self.zz = points[:, 2] * cm2m
+        self.tt = points[:, 3] # ns
+        self.ee = depo['edep'][idx] # MeV
+        self.ll = depo['dx'][idx] # cm, most are 0.5 cm
+        ancestor = self.event.tracks.ancestor[depo['trkId'][idx]]
+        self.cc = np.array(self.USER_COLORS)[ancestor % nColor]
 
     def Jump(self, entryNo, dQthreshold):
         self.event.Jump(entryNo)
@@ -70,73 +60,14 @@ class Plotter:
         self.Collect(dQthreshold)
 
     def Draw(self, axis='yz', value='time', energy= 'GeV', markerSize=3, cmap='jet', vmax=2000):
-        # particle, timing, dE/dx
-        mapping = {'x': self.xx, 'y': self.yy, 'z': self.zz}
-
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(5*2, 4), dpi=100)
-        fig.suptitle(self.event.vertex.GetReaction())
-        cb_ax = fig.add_axes([.94,.124,.02,.754])
-
-        # particle plot
-        ax1.scatter(mapping[axis[1]], mapping[axis[0]], c=self.cc, s=markerSize)
-        if value == 'time':
-            # timing plot
-            norm = matplotlib.colors.LogNorm(vmin=1, vmax=vmax)
-            plot_12 = ax2.scatter(mapping[axis[1]], mapping[axis[0]], c=self.tt, cmap=cmap, vmin=1, vmax=vmax, norm=matplotlib.colors.LogNorm(), s=markerSize)
-            cb_ax.set_xlabel('ns')
-
-        elif value == 'charge':
-            # charge plot
-            norm = matplotlib.colors.LogNorm(vmin=1, vmax=vmax)
-            if energy == 'GeV':
-                plot_12 = ax2.scatter(mapping[axis[1]], mapping[axis[0]], c=self.ee*2, cmap=cmap, vmax=4, s=markerSize)
-            elif energy == 'MeV':
-                #plot_12 = ax2.scatter(mapping[axis[1]], mapping[axis[0]], c=np.divide(self.ee, self.ll), cmap=cmap, vmax=4, s=markerSize)
-                plot_12 = ax2.scatter(mapping[axis[1]], mapping[axis[0]], c=self.ee*2, cmap=cmap, vmax=2.5, s=markerSize)
-            cb_ax.set_xlabel('MeV/cm')
-
-
-        fig.colorbar(plot_12, orientation='vertical', cax=cb_ax)
-        # fig.tight_layout()
-
-        for ax in (ax1, ax2):
-            if self.event.evgen == 'Genie':
-                ax.set_ylim(-4, 4)
-                ax.set_xlim(-2, 8)
-                xpos = -1.8
-                ypos = 3.6
-                interval = 0.35
-            elif self.event.evgen == 'Marley':
-                # Normally Marley use this scale
-                #ax.set_ylim(-1, 1.5)
-                #ax.set_xlim(-1, 1.5)
-                #interval = 0.1
-                # Debug neutron depo
-                #ax.set_ylim(-200, 200)
-                #ax.set_xlim(-200, 200)
-                #interval = 16
-                #xpos = -195
-                #ypos = 190
-                # n-capture scale
-                #xpos = -0.45
-                #ypos = 0.4
-                #ax.set_ylim(-0.5, 0.5)
-                #ax.set_xlim(-0.5, 0.5)
-                xpos = -0.95
-                ypos = 0.9
-                ax.set_ylim(-1, 1)
-                ax.set_xlim(-1, 0.5)
-                interval = 0.1
-            else:
-                print("Unknown event generator!")
-                sys.exit()
-            ax.tick_params(axis='y', direction='in', length=2)
-            ax.tick_params(axis='x', direction='in', length=2)
-            ax.set_xlabel(f'{axis[1]} [m]')
-            if ax == ax1:
-                ax.set_ylabel(f'{axis[0]} [m]')
+        # particle, timing, dE/dx; display.RenderParallel draws many events reusing the figure
+        renderer = DisplayRenderer(self.event.evgen, value, energy, markerSize, cmap, vmax)
+        renderer.Render(self, axis, DisplayFileName(self.event.plotpath, axis, value, energy, self.event.currentEntry))
 
+    def ParticleLabels(self):
+        # (text, color) of the vertex particles, in the colors of their depos
         nColor = len(self.USER_COLORS)
+        labels = []
         countnegId = 0
         for i, particle in enumerate(self.event.vertex.Particles):
             # Skip negative trk id: in the case of Marley events,
@@ -149,21 +80,10 @@ class Plotter:
                 continue
             name = particle.GetName()
             color = self.USER_COLORS[(i-countnegId) % nColor]
-            # pdg = particle.GetPDGCode()
-            # name = particle.GetName()
-            # trkId = particle.GetTrackId()
             mom = particle.GetMomentum()
             KE = mom.E() - mom.M()
-            name = '%s: %.1f MeV' % (name, KE)
-
-            ax1.text(xpos, ypos, name, color=color)
-            ypos -= interval
-
-        #ax2.plot()
-        fig.savefig(self.event.plotpath + '/particle_%s_%s_%s_evt_%d.pdf' % (value, axis, energy, self.event.currentEntry) )
-        plt.clf() # important to clear figure
-        plt.close()
-        #plt.show()
+            labels.append(('%s: %.1f MeV' % (name, KE), color))
+        return labels
 
     # For GeV events
     def hist_dEdx(self):
@@ -194,9 +114,7 @@ class Plotter:
         return self.ll #cm
 
     def hist_trklength(self):
-        all_tracks_length = np.array([])
-        for i, track in enumerate(self.event.tracks):
-            all_tracks_length = np.append(all_tracks_length, track.length['selfDepo'])
+        all_tracks_length = self.event.tracks.selfLength.copy()
 
         plt.hist(all_tracks_length, range=(0,6), bins=100)
         plt.xlabel('track length [cm]')
@@ -206,39 +124,40 @@ class Plotter:
         plt.close()
         return all_tracks_length #cm
 
-    def evt_maxdtdr(self): # per evt has one max dt
-        nedeps = len(self.tt)
-        max_edep_dr, max_edep_dt = 0, 0
-        for iedep in range(nedeps):
-            for jedep in range(iedep+1, nedeps):
-                temp_dt = abs(np.float128(self.tt[iedep] - self.tt[jedep])) # ns
-                # unit m
-                temp_dr = math.sqrt( pow(np.float128(self.xx[iedep] - self.xx[jedep]), 2) + pow(np.float128(self.yy[iedep] - self.yy[jedep]), 2) + pow(np.float128(self.zz[iedep] - self.zz[jedep]), 2) )
-                if temp_dt > max_edep_dt:
-                    max_edep_dt = temp_dt
-                if temp_dr > max_edep_dr:
-                    max_edep_dr = temp_dr
+    # ------------------------
+    def Histograms(self):
+        # empty HISTOGRAMS, to pass to Fill event after event and Save at the end
+        return HistogramSet(HISTOGRAMS)
+
+    def Fill(self, hists):
+        # adds the collected depos of the current event to the histograms
+        hists.Fill('dE_dx', self.ee*2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hists.Fill('LowE_dE_dx', np.divide(self.ee, self.ll))
+        hists.Fill('single_edep_dx', self.ll)
+        hists.Fill('primary_track_length', self.event.tracks.selfLength)
+        maxdr, maxdt = self.evt_maxdtdr()
+        hists.Fill('edeps_max_dr', [maxdr])
+        hists.Fill('edeps_max_dt', [maxdt])
 
-        return [max_edep_dr*100, max_edep_dt] #cm, ns
+    def evt_maxdtdr(self): # per evt has one max dt
+        # unit m
+        points = np.column_stack([self.xx, self.yy, self.zz])
+        return [MaxDistance(points)*100, MaxTimeSpread(self.tt)] #cm, ns
 
     def evt_containment(self, dQthreshold): # per evt edep max distance from origin
-        nedeps = len(self.tt)
-        edep_max_distance = 0
-        for iedep in range(nedeps):
-            if self.ee[iedep] < dQthreshold:
-                pass
-            else:
-                # unit m
-                temp_edep_max_distance = math.sqrt(self.xx[iedep]*self.xx[iedep] + self.yy[iedep]*self.yy[iedep] + self.zz[iedep]*self.zz[iedep])
-                if temp_edep_max_distance > edep_max_distance:
-                    edep_max_distance = temp_edep_max_distance
-
-        return edep_max_distance #m
+        # unit m
+        points = np.column_stack([self.xx, self.yy, self.zz])
+        return MaxNorm(points[self.ee >= dQthreshold]) #m
 
     #---------------------------------------------
-    def DrawROOT(self, dim2d='yz', markerSize=0.2):
+    def DrawROOT(self, dim2d='yz', markerSize=0.2, fileName=None):
+        # all depos, one TGraph per ancestor color; with fileName, drawn in batch
+        # mode and saved to it (e.g. 'display.png')
         import ROOT
-        from ROOT import TH2F, TMarker, TCanvas, TLatex
+        from ROOT import TH2F, TGraph, TCanvas, TLatex
+        if fileName is not None:
+            ROOT.gROOT.SetBatch(True)
         ROOT.gStyle.SetOptStat(0)
         ROOT.gStyle.SetMarkerStyle(24)
         ROOT.gStyle.SetMarkerSize(markerSize)
@@ -249,48 +168,51 @@ class Plotter:
 
         # canvas of 5m x 5m
         dummy = TH2F("dummy", "", 100, -5, 5, 100, -5, 5)
+        dummy.SetDirectory(0)
         dummy.GetXaxis().SetTitle('[m]')
         dummy.GetYaxis().SetTitle('[m]')
         dummy.Draw()
 
         mm2m = 0.001
         txts = []
-        markers = []
+        graphs = []
         txtX = 0.15
         txtY = 0.85
         txtSize = 0.03
-        # nDepo = 0
-        for i, track in enumerate(self.event.tracks):
-            depoList = track.association['depoList']
-            ancestor = track.association['ancestor']
-            color = colors[ancestor % nColor]
-
-
-            if ancestor == i:
-                txt = TLatex()
-                txt = txt.DrawLatexNDC(txtX, txtY, track.GetName())
-                txt.SetTextColor(color)
-                txt.SetTextSize(txtSize)
-                txts.append(txt)
-                txtY -= txtSize
-
-            for j, di in enumerate(depoList):
-                depo = self.event.depos[di]
-                x = (depo.GetStart().X() + depo.GetStop().X()) / 2 * mm2m
-                y = (depo.GetStart().Y() + depo.GetStop().Y()) / 2 * mm2m
-                z = (depo.GetStart().Z() + depo.GetStop().Z()) / 2 * mm2m
-                mapping = {'x': x, 'y': y, 'z': z}
-
-                m = TMarker(mapping[dim2d[1]], mapping[dim2d[0]], 24)
-                m.SetMarkerColor(color)
-
-                m.Draw()
-                markers.append(m)
-                # nDepo += 1
-
-        # print('depo points drawn: ', nDepo, '| total depo: ', self.event.depos.size)
+        tracks = self.event.tracks
+        for i in np.flatnonzero(tracks.ancestor == np.arange(tracks.size)):
+            txt = TLatex()
+            txt = txt.DrawLatexNDC(txtX, txtY, self.event.trajectories[int(i)].GetName())
+            txt.SetTextColor(colors[i % nColor])
+            txt.SetTextSize(txtSize)
+            txts.append(txt)
+            txtY -= txtSize
+
+        depo = self.event.depo
+        trkId = depo['trkId']
+        onTrack = (trkId >= 0) & (trkId < tracks.size)
+        mid = MidPoints(depo)[onTrack, :3] * mm2m
+        color = tracks.ancestor[trkId[onTrack]] % nColor
+        mapping = {'x': 0, 'y': 1, 'z': 2}
+        for k in range(nColor):
+            mask = color == k
+            if not np.any(mask):
+                continue
+            x = np.ascontiguousarray(mid[mask, mapping[dim2d[1]]])
+            y = np.ascontiguousarray(mid[mask, mapping[dim2d[0]]])
+            graph = TGraph(int(x.size), x, y)
+            graph.SetMarkerStyle(24)
+            graph.SetMarkerSize(markerSize)
+            graph.SetMarkerColor(colors[k])
+            graph.Draw('P same')
+            graphs.append(graph)
+        # print('depo points drawn: ', onTrack.sum(), '| total depo: ', trkId.size)
 
         ROOT.gPad.Update()
+        if fileName is not None:
+            c1.SaveAs(fileName)
+        # drawn objects kept alive with the canvas, released by the next call
+        self.rootDisplay = (c1, dummy, graphs, txts)
         return c1
 
 if __name__ == "__main__":
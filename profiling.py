@@ -0,0 +1,110 @@
+import time, json, csv
+from collections import deque
+import numpy as np
+from histograms import Histogram
+
+# Opt-in timing of the processing stages of Event and Writer, enabled with
+# Event(..., profile=True) or writer.py --profile FILE.
+# Each stage (GetEntry, ReadVertex, ReadTracks, ReadEnergyDepo, FillEnergyInfo,
+# ReadGenie/ReadMarley, Fill, ...) is timed exclusive of the stages it calls,
+# and its per-event times are histogrammed in log10(seconds). The numbers of
+# tracks and segments of each event are histogrammed too, and the rate over
+# the last events is kept for the progress print.
+
+TIME_BINS = (80, (-7, 1))       # log10(s)
+COUNT_BINS = (60, (0, 6))       # log10(1 + n)
+
+class StageTimer:
+
+    def __init__(self, window=100):
+        self.stages = {}    # name: [calls, seconds, Histogram of log10(s) per event]
+        self.counts = {name: Histogram(*COUNT_BINS, xlabel=f'log10(1 + {name})') for name in ('tracks', 'segments')}
+        self.totals = {'tracks': 0, 'segments': 0}
+        self.eventTimes = {} # name: seconds in the current event
+        self.stack = []      # [name, start, seconds in nested stages]
+        self.nEvents = 0
+        self.start = time.perf_counter()
+        self.recent = deque(maxlen=window) # end times of the last events
+
+    # ------------------------
+    def Run(self, name, func, *args):
+        # func(*args), timed as stage name
+        self.stack.append([name, time.perf_counter(), 0.])
+        try:
+            return func(*args)
+        finally:
+            name, start, nested = self.stack.pop()
+            elapsed = time.perf_counter() - start
+            self.eventTimes[name] = self.eventTimes.get(name, 0.) + elapsed - nested
+            if self.stack:
+                self.stack[-1][2] += elapsed
+
+    # ------------------------
+    def EndEvent(self, nTracks=None, nSegments=None):
+        # closes the current event; counts are None if the event didn't read them
+        for name, seconds in self.eventTimes.items():
+            stage = self.stages.setdefault(name, [0, 0., Histogram(*TIME_BINS, xlabel=f'log10({name} [s])')])
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2].Fill([np.log10(max(seconds, 1e-9))])
+        self.eventTimes = {}
+        for name, n in (('tracks', nTracks), ('segments', nSegments)):
+            if n is not None:
+                self.counts[name].Fill([np.log10(1 + n)])
+                self.totals[name] += n
+        self.nEvents += 1
+        self.recent.append(time.perf_counter())
+
+    # ------------------------
+    def Rate(self):
+        # events/s over the last window events
+        if len(self.recent) < 2:
+            return 0.
+        return (len(self.recent) - 1) / max(self.recent[-1] - self.recent[0], 1e-9)
+
+    # ------------------------
+    def Merge(self, other):
+        # adds the stages and counts of another timer, e.g. of a worker process
+        for name, (calls, seconds, hist) in other.stages.items():
+            stage = self.stages.setdefault(name, [0, 0., Histogram(*TIME_BINS, xlabel=hist.xlabel)])
+            stage[0] += calls
+            stage[1] += seconds
+            stage[2].Merge(hist)
+        for name in self.counts:
+            self.counts[name].Merge(other.counts[name])
+            self.totals[name] += other.totals[name]
+        self.nEvents += other.nEvents
+        return self
+
+    # ------------------------
+    def Report(self):
+        elapsed = time.perf_counter() - self.start
+        edges = lambda hist: hist.edges.tolist()
+        return {
+            'events': self.nEvents,
+            'seconds': elapsed,
+            'events_per_second': self.nEvents / elapsed if elapsed > 0 else 0.,
+            'recent_events_per_second': self.Rate(),
+            'stages': {name: {'events': calls, 'seconds': seconds, 'mean_seconds': seconds / max(calls, 1),
+                              'log10_seconds_edges': edges(hist), 'log10_seconds_counts': hist.counts.tolist()}
+                       for name, (calls, seconds, hist) in sorted(self.stages.items(), key=lambda s: -s[1][1])},
+            'counts': {name: {'total': self.totals[name], 'log10_1pn_edges': edges(hist),
+                              'log10_1pn_counts': hist.counts.tolist()}
+                       for name, hist in self.counts.items()},
+        }
+
+    # ------------------------
+    def Save(self, fileName):
+        # JSON: the whole Report; CSV: one row per stage
+        report = self.Report()
+        if fileName.lower().endswith('.csv'):
+            with open(fileName, 'w', newline='') as f:
+                out = csv.writer(f)
+                out.writerow(['stage', 'events', 'seconds', 'mean_seconds', 'fraction'])
+                total = sum(s['seconds'] for s in report['stages'].values()) or 1.
+                for name, s in report['stages'].items():
+                    out.writerow([name, s['events'], s['seconds'], s['mean_seconds'], s['seconds'] / total])
+                out.writerow(['events_per_second', report['events'], report['seconds'], report['events_per_second'], ''])
+        else:
+            with open(fileName, 'w') as f:
+                json.dump(report, f, indent=1)
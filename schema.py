@@ -0,0 +1,119 @@
+import numpy as np
+from collections import namedtuple
+from light import LIGHT_YIELDS, LightLabel
+from categories import N_CATEGORIES
+
+# Registry of the per-event observables (the branches of the Sim tree).
+# Event preallocates one record with a field per observable and Writer creates
+# one branch per observable, both from the same list.
+#   name     : info key and branch name
+#   dtype    : 'i4' (int) or 'f4' (float) in the output
+#   shape    : () for a scalar, (N_CATEGORIES,) for the *List branches,
+#              (n_scan, N_CATEGORIES) for the *_scan branches
+#   unit     : as documented in the README
+#   producer : what fills it in Event.Jump
+#       'entry'        : entry number
+#       'generator'    : ReadGenie / ReadMarley
+#       'vertex'       : the vertex GetCrossSection / GetReaction
+#       'available'    : E_avail of the vertex particles
+#       'count'        : number of vertex particles
+#       'descendants:q': track quantity q summed over each primary and its descendants
+#       'track:q'      : quantity q of the primaries longer than 2cm
+#       'blip:q'       : quantity q of the primaries shorter than 2cm, the charge
+#                        of the blips (dots) above the lowest dQ threshold
+#       'scan:q'       : depo quantity q above each scan threshold, summed over each
+#                        primary and its descendants
+#       'scan_track:q' : track quantity q of the primaries longer than each scan length cut
+#       'scan_blip:q'  : track quantity q of the primaries shorter than each scan length cut
+# The per-category observables come in (total, list) pairs sharing a producer,
+# the scans are (n_scan, N_CATEGORIES) lists only.
+
+# dQ thresholds [MeV] on single depos, e.g. '75keV' -> Q_depoTotal_th_75keV
+CHARGE_THRESHOLDS = {'75keV': 0.075, '500keV': 0.5}
+
+# ------------------------
+def DotsThreshold(thresholds):
+    # label of the dQ threshold of the blip (dots) observables: the lowest one,
+    # None without thresholds
+    return min(thresholds, key=thresholds.get) if thresholds else None
+
+Observable = namedtuple('Observable', ['name', 'dtype', 'shape', 'unit', 'producer'])
+
+# ------------------------
+def PerCategory(total, perCategory, producer, unit='MeV'):
+    # a total and its split over the particle categories
+    return [Observable(total, 'f4', (), unit, producer),
+            Observable(perCategory, 'f4', (N_CATEGORIES,), unit, producer)]
+
+# ------------------------
+def BuildSchema(lightYields=LIGHT_YIELDS, thresholds=CHARGE_THRESHOLDS, scanThresholds=(), scanLengthCuts=()):
+    schema = [
+        Observable('Event_ID', 'i4', (), '',     'entry'),
+        Observable('nu_pdg',   'i4', (), '',     'generator'),
+        Observable('nu_xs',    'f4', (), 'cm^2', 'vertex'),
+        Observable('nu_proc',  'i4', (), '',     'vertex'),
+        Observable('nu_nucl',  'i4', (), '',     'vertex'),
+        Observable('E_nu',     'f4', (), 'MeV',  'generator'),
+    ]
+    schema += PerCategory('E_avail', 'E_availList', 'available')
+    schema += PerCategory('E_depoTotal', 'E_depoList', 'descendants:depoTotal')
+    schema += PerCategory('E_depoTotal_track', 'E_depoList_track', 'track:depoTotal')
+    for model in ['', '_MBox']:
+        schema += PerCategory('Q_depoTotal' + model, 'Q_depoList' + model,
+                              'descendants:depoTotal_charge' + model)
+        for label in thresholds:
+            schema += PerCategory('Q_depoTotal%s_th_%s' % (model, label), 'Q_depoList%s_th_%s' % (model, label),
+                                  'descendants:depoTotal_charge%s_th_%s' % (model, label))
+    dots = DotsThreshold(thresholds)
+    if dots is not None:
+        schema += PerCategory('Q_depoTotal_dots_th_' + dots, 'Q_depoList_dots_th_' + dots,
+                              'blip:depoTotal_charge_th_' + dots)
+    for model in ['', '_MBox']:
+        for ly in lightYields:
+            label = LightLabel(ly)
+            schema += PerCategory('L_depoTotal%s_%s' % (model, label), 'L_depoList%s_%s' % (model, label),
+                                  'descendants:depoTotal_light_%s%s' % (label, model))
+    schema.append(Observable('N_parList', 'i4', (N_CATEGORIES,), '', 'count'))
+    if len(scanThresholds):
+        shape = (len(scanThresholds), N_CATEGORIES)
+        schema.append(Observable('Q_depoList_scan', 'f4', shape, 'MeV', 'scan:depoTotal_charge'))
+        schema.append(Observable('Q_depoList_MBox_scan', 'f4', shape, 'MeV', 'scan:depoTotal_charge_MBox'))
+    if len(scanLengthCuts):
+        shape = (len(scanLengthCuts), N_CATEGORIES)
+        schema.append(Observable('E_depoList_track_scan', 'f4', shape, 'MeV', 'scan_track:depoTotal'))
+        if dots is not None:
+            schema.append(Observable('Q_depoList_dots_scan', 'f4', shape, 'MeV', 'scan_blip:depoTotal_charge_th_' + dots))
+    return schema
+
+# ------------------------
+def OutputDtype(schema):
+    # one record of the Sim tree, as written
+    return np.dtype([(obs.name, obs.dtype, obs.shape) for obs in schema])
+
+# ------------------------
+def EventDtype(schema):
+    # the same record kept in double precision while an event is processed
+    return np.dtype([(obs.name, 'f8' if obs.dtype == 'f4' else obs.dtype, obs.shape) for obs in schema])
+
+# groups of per-track quantities, by the configuration they depend on
+#   depo        : energy and length, no configuration
+#   charge      : Birks recombination and dQ thresholds
+#   charge_MBox : Modified Box recombination and dQ thresholds
+#   light       : both recombination models, light yields and smearing seed
+QUANTITY_GROUPS = ['depo', 'charge', 'charge_MBox', 'light']
+
+# ------------------------
+def QuantityGroup(quantity):
+    if quantity.startswith('depoTotal_light_'):
+        return 'light'
+    if quantity.startswith('depoTotal_charge_MBox'):
+        return 'charge_MBox'
+    if quantity.startswith('depoTotal_charge'):
+        return 'charge'
+    return 'depo'
+
+# ------------------------
+def ProducerGroup(producer):
+    # quantity group an observable depends on, 'depo' if it doesn't use any quantity
+    kind, _, quantity = producer.partition(':')
+    return QuantityGroup(quantity) if quantity else 'depo'
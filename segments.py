@@ -0,0 +1,83 @@
+import ROOT
+import numpy as np
+
+# Columnar access to the edep-sim TG4HitSegment containers.
+# Instead of crossing PyROOT once per segment and per getter, a small C++
+# helper copies every segment of a detector into flat NumPy buffers.
+#   edep      : energy deposit [MeV]
+#   length    : track length of the segment [mm]
+#   start     : (n, 4) start position and time (X, Y, Z [mm], T [ns])
+#   stop      : (n, 4) stop position and time (X, Y, Z [mm], T [ns])
+#   primaryId : primary particle id
+#   trkId     : first contributor (the track the segment belongs to)
+
+_helperCode = r'''
+namespace pyedep {
+void FillSegments(const std::vector<TG4HitSegment>& segs,
+                  double* edep, double* length, double* start, double* stop,
+                  int* primaryId, int* trkId) {
+    for (std::size_t i = 0; i < segs.size(); ++i) {
+        const TG4HitSegment& seg = segs[i];
+        edep[i] = seg.GetEnergyDeposit();
+        length[i] = seg.GetTrackLength();
+        const TLorentzVector& a = seg.GetStart();
+        const TLorentzVector& b = seg.GetStop();
+        start[4*i+0] = a.X(); start[4*i+1] = a.Y(); start[4*i+2] = a.Z(); start[4*i+3] = a.T();
+        stop[4*i+0]  = b.X(); stop[4*i+1]  = b.Y(); stop[4*i+2]  = b.Z(); stop[4*i+3]  = b.T();
+        primaryId[i] = seg.GetPrimaryId();
+        trkId[i] = seg.Contrib.empty() ? -1 : seg.Contrib[0];
+    }
+}
+}
+'''
+
+_helperReady = None
+
+# ------------------------
+def HasHelper():
+    # compile the helper once per process; fall back to python if cling can't
+    global _helperReady
+    if _helperReady is None:
+        _helperReady = bool(ROOT.gInterpreter.Declare(_helperCode))
+        if not _helperReady:
+            print("segments: could not compile the C++ helper, reading segments in python")
+    return _helperReady
+
+# ------------------------
+def EmptySegments(n=0):
+    return {
+        'edep'      : np.zeros(n),
+        'length'    : np.zeros(n),
+        'start'     : np.zeros((n, 4)),
+        'stop'      : np.zeros((n, 4)),
+        'primaryId' : np.zeros(n, dtype=np.int32),
+        'trkId'     : np.zeros(n, dtype=np.int32),
+    }
+
+# ------------------------
+def ReadSegments(segs):
+    n = segs.size()
+    depo = EmptySegments(n)
+    if n == 0:
+        return depo
+
+    if HasHelper():
+        ROOT.pyedep.FillSegments(segs, depo['edep'], depo['length'], depo['start'], depo['stop'],
+                                 depo['primaryId'], depo['trkId'])
+        return depo
+
+    for i, seg in enumerate(segs):
+        a = seg.GetStart()
+        b = seg.GetStop()
+        depo['edep'][i] = seg.GetEnergyDeposit()
+        depo['length'][i] = seg.GetTrackLength()
+        depo['start'][i] = (a.X(), a.Y(), a.Z(), a.T())
+        depo['stop'][i] = (b.X(), b.Y(), b.Z(), b.T())
+        depo['primaryId'][i] = seg.GetPrimaryId()
+        depo['trkId'][i] = seg.Contrib[0] if seg.Contrib.size() > 0 else -1
+    return depo
+
+# ------------------------
+def MidPoints(depo):
+    # (n, 4) segment mid points: X, Y, Z [mm], T [ns]
+    return (depo['start'] + depo['stop']) / 2
@@ -0,0 +1,108 @@
+import threading, queue
+import ROOT
+from ROOT import TG4Event, TChain
+
+# Helpers of Event.iter: read-only views of the entries, and the background
+# reading of the entries ahead.
+
+# TChain.GetEntry releases the GIL, for the whole process, so that the main
+# thread runs python while the Prefetcher thread decompresses. GetEntry doesn't
+# call back into python, this only lets other threads run meanwhile.
+# ROOT's own global state is made thread safe once, before any thread starts.
+TChain.GetEntry.__release_gil__ = True
+ROOT.EnableThreadSafety()
+
+class EventView:
+    # One entry of Event.iter. Attributes and methods are the ones of the Event,
+    # valid while the iterator is on this entry, and so is the first access to
+    # info: it takes a read-only copy, which stays valid afterwards.
+
+    def __init__(self, event, entry):
+        self._event = event
+        self.entry = entry
+        self._info = None
+
+    # ------------------------
+    def Check(self):
+        if self._event.currentEntry != self.entry:
+            raise RuntimeError(f"view of entry {self.entry} used after the iterator moved on")
+
+    @property
+    def info(self):
+        if self._info is None:
+            self.Check()
+            self._info = self._event.info.copy()
+            self._info.setflags(write=False)
+        return self._info
+
+    def __getattr__(self, name):
+        self.Check()
+        return getattr(self._event, name)
+
+class EventBatch:
+    # batch_size entries of Event.iter: the entry numbers and their (n,) info records, read-only
+
+    def __init__(self, entries, info):
+        self.entries = entries
+        self.info = info
+        self.entries.setflags(write=False)
+        self.info.setflags(write=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+class Prefetcher:
+    # Reads the TG4Event of the next batch in a background thread, with its own
+    # chain, while the current batch is processed. Three sets of TG4Event are
+    # recycled in turn: the batch being processed, the one waiting in the queue
+    # and the one being read.
+
+    def __init__(self, fileName, branchStatus, batches):
+        # branchStatus: [(pattern, status)] applied to the chain, as on Event.simTree
+        self.chain = TChain("EDepSimEvents")
+        self.chain.Add(fileName)
+        for pattern, status in branchStatus:
+            self.chain.SetBranchStatus(pattern, status)
+        size = max((len(batch) for batch in batches), default=0)
+        self.pool = [[TG4Event() for _ in range(size)] for _ in range(3)]
+        self.batches = batches
+        self.queue = queue.Queue(maxsize=1)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.Run, daemon=True)
+        self.thread.start()
+
+    # ------------------------
+    def Run(self):
+        try:
+            for k, batch in enumerate(self.batches):
+                events = self.pool[k % 3][:len(batch)]
+                for entry, event in zip(batch, events):
+                    if self.stop.is_set():
+                        return
+                    self.chain.SetBranchAddress("Event", event)
+                    self.chain.GetEntry(int(entry))
+                self.Put(events)
+        except Exception as error:
+            self.Put(error)
+
+    # ------------------------
+    def Put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    # ------------------------
+    def Next(self):
+        # the TG4Event of the next batch, in entry order
+        item = self.queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    # ------------------------
+    def Close(self):
+        self.stop.set()
+        self.thread.join()
@@ -0,0 +1,26 @@
+import os, sys
+import numpy as np
+import pytest
+
+# the modules are flat at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures
+
+# ------------------------
+@pytest.fixture(params=list(fixtures.SIZES))
+def synthetic(request):
+    # one synthetic event of fixtures.py per event size, with a fixed seed
+    nTracks, nSegments = fixtures.SIZES[request.param]
+    return fixtures.SyntheticEvent(np.random.default_rng(12345), nTracks, nSegments)
+
+# ------------------------
+@pytest.fixture
+def edepsim(tmp_path, monkeypatch):
+    # ROOT with the edep-sim io classes, run from tmp_path (Event creates ./plots)
+    ROOT = pytest.importorskip('ROOT')
+    if not hasattr(ROOT, 'TG4Event'):
+        pytest.skip('the edep-sim io library is not loaded')
+    ROOT.gROOT.SetBatch(True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,49 @@
+import numpy as np
+import fixtures
+
+N_EVENTS = 4
+
+# ------------------------
+def Infos(fileName, entries, **options):
+    from event import Event
+    event = Event(fileName, 'Marley', **options)
+    infos = []
+    for entry in entries:
+        event.Jump(entry)
+        infos.append(event.info.copy())
+    return event, infos
+
+# ------------------------
+def test_same_file_at_two_chain_offsets(edepsim):
+    # b alone warms the cache, then a + b reads it back with b at chain offset N_EVENTS
+    fixtures.WriteFixture(str(edepsim / 'a_nue_10MeV_x.root'), N_EVENTS, 20, 200, seed=1)
+    fixtures.WriteFixture(str(edepsim / 'b_nue_10MeV_x.root'), N_EVENTS, 20, 200, seed=2)
+    cacheDir = str(edepsim / 'cache')
+    Infos(str(edepsim / 'b_nue_10MeV_x.root'), range(N_EVENTS), cacheDir=cacheDir)
+
+    chain = str(edepsim / '?_nue_10MeV_x.root')
+    event, _ = Infos(chain, [])
+    files, offsets = event.ChainFiles()
+    offset = int(offsets[[f.endswith('b_nue_10MeV_x.root') for f in files].index(True)])
+    assert offset == N_EVENTS
+    entries = range(offset, offset + N_EVENTS)
+    _, fresh = Infos(chain, entries)
+    _, cached = Infos(chain, entries, cacheDir=cacheDir)
+
+    assert [int(info['Event_ID']) for info in cached] == list(entries)
+    for a, b in zip(fresh, cached):
+        for name in a.dtype.names:
+            assert np.array_equal(a[name], b[name]), name
+
+# ------------------------
+def test_warm_cache_matches_fresh_run(edepsim):
+    fileName = str(edepsim / 'c_nue_10MeV_x.root')
+    fixtures.WriteFixture(fileName, N_EVENTS, 20, 200, seed=3)
+    cacheDir = str(edepsim / 'cache')
+    _, fresh = Infos(fileName, range(N_EVENTS))
+    _, cold = Infos(fileName, range(N_EVENTS), cacheDir=cacheDir)
+    _, warm = Infos(fileName, range(N_EVENTS), cacheDir=cacheDir)
+    for a, b, c in zip(fresh, cold, warm):
+        for name in a.dtype.names:
+            assert np.array_equal(a[name], b[name]), name
+            assert np.array_equal(a[name], c[name]), name
@@ -0,0 +1,43 @@
+import numpy as np
+from categories import Category, SumByCategory, N_CATEGORIES, MASS_INCLUDED
+
+# ------------------------
+def LoopCategory(pdg):
+    # the if/elif chain of FillEnergyInfo before the category table
+    if pdg in [13, -13, 11, -11]:
+        return 0
+    elif pdg == 2212:
+        return 1
+    elif pdg == 2112:
+        return 2
+    elif pdg in [211, -211]:
+        return 3
+    elif pdg == 111:
+        return 4
+    elif pdg == 22:
+        return 5
+    elif pdg == 1000020040:
+        return 6
+    return 7
+
+PDGS = [13, -13, 11, -11, 2212, 2112, 211, -211, 111, 22, 1000020040, 0, 12, -2212, 1000180400, 3122]
+
+# ------------------------
+def test_category():
+    assert Category(PDGS).tolist() == [LoopCategory(pdg) for pdg in PDGS]
+    # mesons and leptons include their mass in E_avail
+    assert [bool(MASS_INCLUDED[LoopCategory(pdg)]) for pdg in (11, 211, 111, 22, 2212, 2112)] == \
+        [True, True, True, True, False, False]
+
+# ------------------------
+def test_sum_by_category(synthetic):
+    pdg = synthetic['pdg']
+    values = np.column_stack([synthetic['momentum'][:, 3], np.arange(pdg.size, dtype=float)])
+    expected = np.zeros((N_CATEGORIES, 2))
+    for p, row in zip(pdg, values):
+        expected[LoopCategory(p)] += row
+    assert np.allclose(SumByCategory(Category(pdg), values), expected)
+    # (n, n_scan) values give (N_CATEGORIES, n_scan) sums
+    scan = np.repeat(values[:, :1], 3, axis=1) * [1, 2, 3]
+    assert np.allclose(SumByCategory(Category(pdg), scan), expected[:, :1] * [1, 2, 3])
+    assert SumByCategory(Category(pdg[:0]), values[:0]).shape == (N_CATEGORIES, 2)
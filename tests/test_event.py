@@ -0,0 +1,55 @@
+import numpy as np
+import fixtures
+from categories import Category, SumByCategory, MASS_INCLUDED, N_CATEGORIES
+
+N_EVENTS = 3
+SIZE = (40, 500)
+
+# ------------------------
+def Synthetic(seed):
+    # the events of WriteFixture(..., seed=seed), regenerated in the same order
+    rng = np.random.default_rng(seed)
+    return [fixtures.SyntheticEvent(rng, *SIZE) for _ in range(N_EVENTS)]
+
+# ------------------------
+def test_info_matches_synthetic_events(edepsim):
+    from event import Event
+    fileName = str(edepsim / 'd_nue_10MeV_x.root')
+    fixtures.WriteFixture(fileName, N_EVENTS, *SIZE, seed=4)
+    event = Event(fileName, 'Marley')
+    for entry, data in enumerate(Synthetic(4)):
+        event.Jump(entry)
+        info = event.info
+        primaries = np.flatnonzero(data['parentId'] == -1)
+        cat = Category(data['pdg'][primaries])
+        momentum = data['momentum'][primaries]
+        mass = np.sqrt(np.maximum(momentum[:, 3]**2 - np.sum(momentum[:, :3]**2, axis=1), 0))
+        available = np.where(MASS_INCLUDED[cat], momentum[:, 3], momentum[:, 3] - mass)
+        # every depo is summed into the category of the primary it descends from
+        depoList = np.bincount(Category(data['pdg'][data['segPrimary']]), weights=data['edep'], minlength=N_CATEGORIES)
+        assert info['Event_ID'] == entry
+        assert np.allclose(info['E_depoTotal'], data['edep'].sum(), rtol=1e-5)
+        assert np.allclose(info['E_depoList'], depoList, rtol=1e-5, atol=1e-9)
+        assert np.allclose(info['E_availList'], SumByCategory(cat, available[:, None])[:, 0], rtol=1e-5)
+        assert np.array_equal(info['N_parList'], np.bincount(cat, minlength=N_CATEGORIES))
+        assert info['E_nu'] == 10
+
+# ------------------------
+def test_custom_thresholds(edepsim):
+    from event import Event
+    fileName = str(edepsim / 'e_nue_10MeV_x.root')
+    fixtures.WriteFixture(fileName, N_EVENTS, *SIZE, seed=5)
+    default = Event(fileName, 'Marley')
+    custom = Event(fileName, 'Marley', thresholds={'100keV': 0.1}, scanThresholds=[0.075, 0.1],
+                   scanLengthCuts=[2])
+    for entry in range(N_EVENTS):
+        default.Jump(entry)
+        custom.Jump(entry)
+        assert 'Q_depoTotal_dots_th_75keV' not in custom.info.dtype.names
+        # the 100keV column equals the 100keV scan row, and the 2cm dots scan row
+        # the 100keV dots column
+        assert np.allclose(custom.info['Q_depoList_th_100keV'], custom.info['Q_depoList_scan'][1])
+        assert np.allclose(custom.info['Q_depoList_dots_th_100keV'], custom.info['Q_depoList_dots_scan'][0])
+        # the 75keV scan row equals the default 75keV column
+        assert np.allclose(default.info['Q_depoList_th_75keV'], custom.info['Q_depoList_scan'][0])
+        assert len(custom.GetChargeDepoWithDesendents(0)) == 2
@@ -0,0 +1,74 @@
+import math
+import numpy as np
+from extent import MaxDistance, MaxTimeSpread, MaxNorm, EventExtents
+
+# ------------------------
+def LoopMaxDtDr(points, t):
+    # the pairwise loops of Plotter.evt_maxdtdr before extent.py
+    maxdr, maxdt = 0., 0.
+    for i in range(len(points)):
+        for j in range(i+1, len(points)):
+            maxdr = max(maxdr, math.sqrt(sum((points[i][k] - points[j][k])**2 for k in range(3))))
+            maxdt = max(maxdt, abs(t[i] - t[j]))
+    return maxdr, maxdt
+
+# ------------------------
+def PairwiseMax(points):
+    # the same distances as LoopMaxDtDr, all at once, for more points
+    d2 = np.sum((points[:, None, :] - points[None, :, :])**2, axis=2)
+    return float(np.sqrt(d2.max()))
+
+# ------------------------
+def MidPoints(data):
+    mid = (data['start'] + data['stop']) / 2
+    return mid[:, :3], mid[:, 3]
+
+# ------------------------
+def test_max_distance(synthetic):
+    points, t = MidPoints(synthetic)
+    small = slice(0, 300)
+    maxdr, maxdt = LoopMaxDtDr(points[small].tolist(), t[small].tolist())
+    assert math.isclose(MaxDistance(points[small]), maxdr, rel_tol=1e-12)
+    assert math.isclose(MaxTimeSpread(t[small]), maxdt, rel_tol=1e-12)
+    # blocks smaller than the candidates, and a subset too large for the loops
+    subset = points[::max(1, len(points) // 1000)]
+    assert math.isclose(MaxDistance(subset, block=64), PairwiseMax(subset), rel_tol=1e-12)
+    assert math.isclose(MaxNorm(points), max(math.sqrt(sum(x**2 for x in p)) for p in points.tolist()), rel_tol=1e-12)
+
+# ------------------------
+def test_max_distance_edge_cases():
+    assert MaxDistance(np.zeros((0, 3))) == 0.
+    assert MaxDistance(np.ones((1, 3))) == 0.
+    assert MaxDistance(np.ones((5, 3))) == 0.
+    assert MaxTimeSpread(np.array([3.])) == 0.
+    assert MaxNorm(np.zeros((0, 3))) == 0.
+    # points on a sphere: the centroid bound prunes nothing
+    rng = np.random.default_rng(1)
+    sphere = rng.normal(size=(700, 3))
+    sphere /= np.linalg.norm(sphere, axis=1)[:, None]
+    assert math.isclose(MaxDistance(sphere, block=100), PairwiseMax(sphere), rel_tol=1e-12)
+
+# ------------------------
+def test_max_distance_small_blocks():
+    # flat random clouds, some of them with a diameter longer than the first
+    # bound of MaxDistance, so that the blocks have to find it
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        points = rng.normal(size=(20, 3)) * [3, 1, 0.3]
+        for block in (1, 4, 512):
+            assert math.isclose(MaxDistance(points, block), PairwiseMax(points), rel_tol=1e-12)
+
+# ------------------------
+def test_event_extents(synthetic):
+    points, t = MidPoints(synthetic)
+    # events of the depos of each primary shower, one of them empty
+    order = np.argsort(synthetic['segPrimary'], kind='stable')
+    counts = np.bincount(synthetic['segPrimary'], minlength=3)
+    ptr = np.concatenate([[0], np.cumsum(np.insert(counts, 1, 0))])
+    points, t = points[order][:1000], t[order][:1000]
+    ptr = np.minimum(ptr, 1000)
+    maxdr, maxdt = EventExtents(points, t, ptr)
+    for k in range(len(ptr) - 1):
+        rows = slice(ptr[k], ptr[k+1])
+        assert math.isclose(maxdr[k], PairwiseMax(points[rows]) if ptr[k+1] > ptr[k] else 0., rel_tol=1e-12)
+        assert math.isclose(maxdt[k], np.ptp(t[rows]) if ptr[k+1] > ptr[k] else 0., rel_tol=1e-12)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from histograms import Histogram, HistogramSet
+
+# ------------------------
+def test_fill_matches_np_histogram(synthetic):
+    values = synthetic['length'] / 10 # cm
+    hist = Histogram(100, (0, 0.4))
+    # event after event, as Plotter.Fill
+    for chunk in np.array_split(values, 7):
+        hist.Fill(chunk)
+    counts, edges = np.histogram(values, bins=100, range=(0, 0.4))
+    assert np.array_equal(hist.counts, counts)
+    assert np.array_equal(hist.edges, edges)
+    assert hist.underflow == 0
+    assert hist.overflow == np.sum(values > 0.4)
+
+# ------------------------
+def test_weights_and_edges():
+    hist = Histogram(4, (0, 4))
+    hist.Fill([-1, 0, 1, 3.999, 4, 4.5, np.inf, np.nan], weights=[1, 2, 3, 4, 5, 6, 7, 8])
+    # high is in the last bin as in np.histogram, inf in the overflow, NaN dropped
+    assert hist.counts.tolist() == [2, 3, 0, 9]
+    assert hist.underflow == 1
+    assert hist.overflow == 13
+
+# ------------------------
+def test_merge(synthetic):
+    edep = synthetic['edep']
+    whole = Histogram(50, (0, 2), 'edep')
+    whole.Fill(edep)
+    parts = [Histogram(50, (0, 2), 'edep') for _ in range(3)]
+    for part, chunk in zip(parts, np.array_split(edep, 3)):
+        part.Fill(chunk)
+    merged = parts[0].Merge(parts[1]).Merge(parts[2])
+    assert np.array_equal(merged.counts, whole.counts)
+    assert merged.overflow == whole.overflow
+
+    hists = HistogramSet({'edep': (50, (0, 2), 'edep', False), 'length': (10, (0, 5), 'length', True)})
+    other = HistogramSet({'edep': (50, (0, 2), 'edep', False), 'length': (10, (0, 5), 'length', True)})
+    hists.Fill('edep', edep[:100])
+    other.Fill('edep', edep[100:])
+    assert np.array_equal(hists.Merge(other)['edep'].counts, whole.counts)
+
+# ------------------------
+def test_merge_different_binning():
+    with pytest.raises(ValueError):
+        Histogram(10, (0, 1)).Merge(Histogram(10, (0, 2)))
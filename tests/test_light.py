@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from light import LightSmearing
+
+# ------------------------
+@pytest.mark.parametrize('fluctuation', ['gauss', 'poisson'])
+def test_zero_length_depo(fluctuation):
+    edep = np.array([1., 2.])
+    # the Modified Box light edep*ln(A+B*dEdx)/(B*dEdx) of a 0.5 MeV/cm depo
+    # and of a depo without length, which is inf/inf
+    dEdx = np.array([0.5, np.inf])
+    with np.errstate(invalid='ignore'):
+        Ldep_MBox = edep*np.log(0.93 + dEdx)/dEdx
+    assert np.isnan(Ldep_MBox[1])
+
+    light = LightSmearing(seed=3, fluctuation=fluctuation)
+    smeared, smeared_MBox = light.Smear(edep, Ldep_MBox, 7)
+    assert np.all(np.isfinite(smeared)) and np.all(np.isfinite(smeared_MBox))
+    assert np.all(smeared_MBox[1] == 0)
+    # the first depo draws the same light as alone
+    alone, alone_MBox = light.Smear(edep[:1], Ldep_MBox[:1], 7)
+    assert np.array_equal(alone[0], smeared[0])
+    assert np.array_equal(alone_MBox[0], smeared_MBox[0])
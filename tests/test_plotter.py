@@ -0,0 +1,36 @@
+import numpy as np
+import fixtures
+
+N_EVENTS = 2
+SIZE = (40, 500)
+NEUTRON = 2112
+
+# ------------------------
+def test_collect_neutron_depos_above_threshold(edepsim):
+    from event import Event
+    from plotter import Plotter
+    fileName = str(edepsim / 'p_nue_10MeV_x.root')
+    fixtures.WriteFixture(fileName, N_EVENTS, *SIZE, seed=8)
+    # the events of the fixture, regenerated in the same order
+    rng = np.random.default_rng(8)
+    p = Plotter(Event(fileName, 'Marley'))
+    for entry in range(N_EVENTS):
+        data = fixtures.SyntheticEvent(rng, *SIZE)
+        # Collect keeps the depos of the tracks descending from a primary neutron,
+        # track after track, with a Birks charge above the threshold
+        fromNeutron = data['pdg'][data['segPrimary']] == NEUTRON
+        Q = p.event.ChargeBirksLaw(data['edep'], data['length']*0.1)
+        # a threshold between two charges, away from the float rounding of the file
+        q = np.unique(Q[fromNeutron])
+        threshold = (q[q.size//2 - 1] + q[q.size//2]) / 2
+        keep = fromNeutron & (Q > threshold)
+        assert 0 < keep.sum() < fromNeutron.sum() < Q.size
+
+        p.Jump(entry, threshold)
+        mid = (data['start'][keep] + data['stop'][keep]) / 2
+        assert np.allclose(np.column_stack([p.xx, p.yy, p.zz]), mid[:, :3]*1e-3, rtol=1e-5) # m
+        assert np.allclose(p.tt, mid[:, 3], rtol=1e-5)
+        assert np.allclose(p.ee, data['edep'][keep], rtol=1e-5)
+        assert np.allclose(p.ll, data['length'][keep]*0.1, rtol=1e-5)
+        nColor = len(p.USER_COLORS)
+        assert p.cc.tolist() == [p.USER_COLORS[i % nColor] for i in data['segPrimary'][keep]]
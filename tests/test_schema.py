@@ -0,0 +1,61 @@
+from schema import BuildSchema, OutputDtype, EventDtype, DotsThreshold, ProducerGroup, QUANTITY_GROUPS
+
+# the leaves of the Sim tree as declared one by one in the Writer before schema.py
+OLD_LEAVES = [
+    'Event_ID/I', 'nu_pdg/I', 'nu_xs/F', 'nu_proc/I', 'nu_nucl/I', 'E_nu/F',
+    'E_avail/F', 'E_availList[8]/F',
+    'E_depoTotal/F', 'E_depoList[8]/F',
+    'E_depoTotal_track/F', 'E_depoList_track[8]/F',
+    'Q_depoTotal/F', 'Q_depoList[8]/F',
+    'Q_depoTotal_th_75keV/F', 'Q_depoList_th_75keV[8]/F',
+    'Q_depoTotal_th_500keV/F', 'Q_depoList_th_500keV[8]/F',
+    'Q_depoTotal_MBox/F', 'Q_depoList_MBox[8]/F',
+    'Q_depoTotal_MBox_th_75keV/F', 'Q_depoList_MBox_th_75keV[8]/F',
+    'Q_depoTotal_MBox_th_500keV/F', 'Q_depoList_MBox_th_500keV[8]/F',
+    'Q_depoTotal_dots_th_75keV/F', 'Q_depoList_dots_th_75keV[8]/F',
+] + [leaf for model in ['', '_MBox'] for ly in [220, 180, 140, 100, 35]
+     for leaf in ('L_depoTotal%s_avg_%dPEpMeV/F' % (model, ly), 'L_depoList%s_avg_%dPEpMeV[8]/F' % (model, ly))] + [
+    'N_parList[8]/I',
+]
+
+# ------------------------
+def Leaves(schema):
+    # as writer.LeafList
+    return [obs.name + ''.join(f'[{n}]' for n in obs.shape) + ('/I' if obs.dtype == 'i4' else '/F') for obs in schema]
+
+# ------------------------
+def test_default_layout():
+    schema = BuildSchema()
+    assert Leaves(schema) == OLD_LEAVES
+    assert OutputDtype(schema).names == EventDtype(schema).names
+    assert OutputDtype(schema)['E_depoList'].shape == (8,)
+    assert all(ProducerGroup(obs.producer) in QUANTITY_GROUPS for obs in schema)
+
+# ------------------------
+def test_custom_thresholds():
+    # the dots columns follow the lowest threshold, whatever its label
+    thresholds = {'1MeV': 1.0, '100keV': 0.1}
+    assert DotsThreshold(thresholds) == '100keV'
+    schema = BuildSchema(thresholds=thresholds, scanLengthCuts=[1, 2, 3])
+    names = [obs.name for obs in schema]
+    for label in thresholds:
+        assert 'Q_depoList_th_' + label in names
+        assert 'Q_depoList_MBox_th_' + label in names
+    assert not any('75keV' in name or '500keV' in name for name in names)
+    producers = {obs.name: obs.producer for obs in schema}
+    assert producers['Q_depoTotal_dots_th_100keV'] == 'blip:depoTotal_charge_th_100keV'
+    assert producers['Q_depoList_dots_scan'] == 'scan_blip:depoTotal_charge_th_100keV'
+
+    # without thresholds there is no dots column
+    names = [obs.name for obs in BuildSchema(thresholds={}, scanLengthCuts=[1])]
+    assert not any('dots' in name for name in names)
+
+# ------------------------
+def test_scan_layout():
+    schema = BuildSchema(scanThresholds=[0.05, 0.1], scanLengthCuts=[1, 2, 3])
+    assert Leaves(schema)[:len(OLD_LEAVES)] == OLD_LEAVES
+    assert Leaves(schema)[len(OLD_LEAVES):] == [
+        'Q_depoList_scan[2][8]/F', 'Q_depoList_MBox_scan[2][8]/F',
+        'E_depoList_track_scan[3][8]/F', 'Q_depoList_dots_scan[3][8]/F',
+    ]
+    assert OutputDtype(schema)['Q_depoList_scan'].shape == (2, 8)
@@ -0,0 +1,119 @@
+import numpy as np
+from tracks import GenerationDepth, NearestAncestor, SubtreeSums, GroupBy, TrackTable
+
+# the loops over the trajectory tree that the kernels of tracks.py replaced
+
+# ------------------------
+def LoopDepth(parentIds):
+    depth = []
+    for i in range(parentIds.size):
+        d, parId = 0, parentIds[i]
+        while parId != -1:
+            d += 1
+            parId = parentIds[parId]
+        depth.append(d)
+    return np.array(depth)
+
+# ------------------------
+def LoopNearestAncestor(parentIds, mask):
+    nearest = []
+    for i in range(parentIds.size):
+        j = i
+        while j != -1 and not mask[j]:
+            j = parentIds[j]
+        nearest.append(j)
+    return np.array(nearest)
+
+# ------------------------
+def LoopChildren(parentIds):
+    children = [[] for _ in range(parentIds.size)]
+    for i, parId in enumerate(parentIds):
+        if parId != -1:
+            children[parId].append(i)
+    return children
+
+# ------------------------
+def LoopWithDescendants(children, values, trkId):
+    # as Event.GetEnergyDepoWithDesendents before the TrackTable
+    total = values[trkId].copy()
+    for childId in children[trkId]:
+        total += LoopWithDescendants(children, values, childId)
+    return total
+
+# ------------------------
+def Columns(data):
+    return np.arange(data['pdg'].size, dtype=np.int32), data['parentId'], data['pdg'], data['momentum']
+
+# ------------------------
+def test_generation_depth(synthetic):
+    assert np.array_equal(GenerationDepth(synthetic['parentId']), LoopDepth(synthetic['parentId']))
+
+# ------------------------
+def test_nearest_ancestor(synthetic):
+    parentIds, pdg = synthetic['parentId'], synthetic['pdg']
+    for mask in (parentIds == -1, pdg == 2112, pdg == 22, np.zeros(pdg.size, dtype=bool)):
+        assert np.array_equal(NearestAncestor(parentIds, mask), LoopNearestAncestor(parentIds, mask))
+
+# ------------------------
+def test_subtree_sums(synthetic):
+    parentIds = synthetic['parentId']
+    n = parentIds.size
+    values = np.column_stack([np.bincount(synthetic['segTrk'], weights=synthetic['edep'], minlength=n),
+                              np.bincount(synthetic['segTrk'], weights=synthetic['length'], minlength=n)])
+    sums = SubtreeSums(values, parentIds, GenerationDepth(parentIds))
+    children = LoopChildren(parentIds)
+    expected = np.array([LoopWithDescendants(children, values, i) for i in range(n)])
+    assert np.allclose(sums, expected)
+    # every depo ends up in exactly one primary
+    assert np.allclose(sums[parentIds == -1].sum(axis=0), values.sum(axis=0))
+
+# ------------------------
+def test_deep_chain():
+    # one chain of 1000 generations, with neutrons every 7 tracks
+    parentIds = np.arange(-1, 999, dtype=np.int32)
+    mask = np.arange(1000) % 7 == 3
+    assert np.array_equal(GenerationDepth(parentIds), np.arange(1000))
+    assert np.array_equal(NearestAncestor(parentIds, mask), LoopNearestAncestor(parentIds, mask))
+    sums = SubtreeSums(np.ones((1000, 1)), parentIds, GenerationDepth(parentIds))
+    assert np.array_equal(sums[:, 0], np.arange(1000, 0, -1))
+
+# ------------------------
+def test_group_by(synthetic):
+    n = synthetic['parentId'].size
+    ptr, idx = GroupBy(synthetic['segTrk'], n)
+    for i in range(n):
+        assert np.array_equal(idx[ptr[i]:ptr[i+1]], np.flatnonzero(synthetic['segTrk'] == i))
+
+# ------------------------
+def test_group_by_without_track():
+    # segments without contributor have trkId -1 and belong to no track
+    keys = np.array([2, -1, 0, 2, -1, 1, 0], dtype=np.int32)
+    ptr, idx = GroupBy(keys, 3)
+    assert ptr.tolist() == [0, 2, 3, 5]
+    assert idx.tolist() == [2, 6, 5, 0, 3]
+
+# ------------------------
+def test_track_table(synthetic):
+    table = TrackTable.FromColumns(*Columns(synthetic))
+    parentIds, pdg = synthetic['parentId'], synthetic['pdg']
+    ancestor = LoopNearestAncestor(parentIds, parentIds == -1)
+    assert np.array_equal(table.ancestor, ancestor)
+    assert np.array_equal(table.primaryPdg, pdg[ancestor])
+    assert np.array_equal(table.neutronAncestor, LoopNearestAncestor(parentIds, pdg == 2112))
+    children = LoopChildren(parentIds)
+    for i in range(table.size):
+        assert table.Children(i).tolist() == children[i]
+    assert np.allclose(table.KE, synthetic['momentum'][:, 3] - np.sqrt(np.maximum(
+        synthetic['momentum'][:, 3]**2 - np.sum(synthetic['momentum'][:, :3]**2, axis=1), 0)))
+
+    # sums added in two steps are folded like in one
+    edep = np.bincount(synthetic['segTrk'], weights=synthetic['edep'], minlength=table.size)
+    table.SetDepos(synthetic['segTrk'], np.bincount(synthetic['segTrk'], weights=synthetic['length'], minlength=table.size))
+    table.AddDepoSums({'depoTotal': edep})
+    table.AddDepoSums({'depoTotal': 2*edep, 'twice': 2*edep})
+    assert np.array_equal(table.Depo('depoTotal'), edep)
+    expected = np.array([LoopWithDescendants(children, edep, i) for i in range(table.size)])
+    assert np.allclose(table.DepoWithDesendents('depoTotal'), expected)
+    assert np.allclose(table.DepoWithDesendents('twice'), 2*expected)
+    for i in range(table.size):
+        assert np.array_equal(table.Depos(i), np.flatnonzero(synthetic['segTrk'] == i))
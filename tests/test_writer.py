@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import fixtures
+
+N_EVENTS = 5
+OPTIONS = {'scanThresholds': [0.05, 0.1], 'scanLengthCuts': [1, 2]}
+
+# ------------------------
+def ReadSim(fileName):
+    # the Sim tree of Writer, leaf by leaf, flattened
+    import ROOT
+    f = ROOT.TFile(fileName)
+    tree = f.Get('Sim')
+    names = [branch.GetName() for branch in tree.GetListOfBranches()]
+    columns = {name: [] for name in names}
+    for i in range(tree.GetEntries()):
+        tree.GetEntry(i)
+        for name in names:
+            leaf = tree.GetLeaf(name)
+            columns[name].append([leaf.GetValue(k) for k in range(leaf.GetLen())])
+    f.Close()
+    return names, {name: np.array(rows) for name, rows in columns.items()}
+
+# ------------------------
+def Flat(column):
+    return np.asarray(column, dtype=float).reshape(len(column), -1)
+
+# ------------------------
+@pytest.mark.parametrize('ext, module', [('.parquet', 'pyarrow.parquet'), ('.h5', 'h5py')])
+def test_column_writer_matches_writer(edepsim, ext, module):
+    reader = pytest.importorskip(module)
+    from event import Event
+    from writer import Writer, ColumnWriter
+    fileName = str(edepsim / 'w_nue_10MeV_x.root')
+    fixtures.WriteFixture(fileName, N_EVENTS, 20, 200, seed=6)
+    w = Writer(Event(fileName, 'Marley', **OPTIONS), str(edepsim / 'sim.root'))
+    w.Write()
+    w.Close()
+    names, expected = ReadSim(str(edepsim / 'sim.root'))
+
+    # chunks smaller than the entries, so that the buffer is flushed more than once
+    outfile = str(edepsim / ('sim' + ext))
+    cw = ColumnWriter(Event(fileName, 'Marley', **OPTIONS), outfile, chunkSize=2)
+    cw.Write()
+    cw.Close()
+    if ext == '.parquet':
+        table = reader.read_table(outfile)
+        assert table.column_names == names
+        columns = {name: [np.ravel(value) for value in table[name].to_pylist()] for name in names}
+    else:
+        with reader.File(outfile, 'r') as f:
+            assert sorted(f['Sim']) == sorted(names)
+            columns = {name: f['Sim'][name][:] for name in names}
+    for name in names:
+        assert np.allclose(Flat(columns[name]), expected[name], rtol=1e-6), name
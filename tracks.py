@@ -0,0 +1,184 @@
+import numpy as np
+
+# Array operations on the trajectory tree.
+# Trajectories are indexed by track id, parentIds[i] is the parent of track i
+# (-1 for primaries).
+
+# ------------------------
+def GenerationDepth(parentIds):
+    # number of generations between each track and its primary (0 for primaries),
+    # by pointer jumping: O(n log depth) instead of walking every chain
+    idx = np.arange(parentIds.size)
+    up = np.where(parentIds == -1, idx, parentIds)
+    depth = (parentIds != -1).astype(np.int32)
+    while (parentIds[up] != -1).any():
+        depth = depth + depth[up]
+        up = up[up]
+    return depth
+
+# ------------------------
+def NearestAncestor(parentIds, mask):
+    # nearest track on the way up to the primary (the track itself included)
+    # with mask set, -1 if there is none; by pointer jumping as above
+    nearest = np.where(mask, np.arange(parentIds.size), -1).astype(np.int32)
+    up = parentIds.copy()
+    todo = np.flatnonzero((nearest == -1) & (up != -1))
+    while todo.size:
+        hop = up[todo]
+        found = nearest[hop]
+        nearest[todo] = found
+        # nothing flagged between todo and hop: continue from where hop points to
+        up[todo] = np.where(found == -1, up[hop], -1)
+        todo = todo[up[todo] != -1]
+    return nearest
+
+# ------------------------
+def SubtreeSums(values, parentIds, depth):
+    # values: (n_tracks, n_quantities) self sums of each track
+    # returns the sums over each track and all its descendants, obtained by
+    # folding one generation at a time into its parents, deepest first
+    sums = np.array(values, dtype=float)
+    for d in range(depth.max(initial=0), 0, -1):
+        level = np.flatnonzero(depth == d)
+        np.add.at(sums, parentIds[level], sums[level])
+    return sums
+
+# ------------------------
+def GroupBy(keys, n):
+    # CSR grouping of the indices of keys by key value in [0, n):
+    # the indices with key i are idx[ptr[i]:ptr[i+1]], in increasing order;
+    # the ones with a key outside [0, n) (e.g. trkId -1) are in no group
+    idx = np.argsort(keys, kind='stable').astype(np.int32)
+    ptr = np.searchsorted(keys[idx], np.arange(n+1))
+    return ptr - ptr[0], idx[ptr[0]:ptr[n]]
+
+class TrackTable:
+    # Per-event table of the trajectories, one row per track id.
+    #   trkId, parentId, pdg : from the TG4Trajectory
+    #   momentum             : (n, 4) initial momentum (px, py, pz, E) [MeV]
+    #   mass, KE             : [MeV]
+    #   depth, ancestor      : generations to the primary, and the primary itself
+    #   primaryPdg           : pdg of the primary the track descends from
+    #   neutronAncestor      : nearest neutron among the track and its ancestors, -1 if none
+    #   childPtr, childIdx   : CSR children of each track
+    #   depoPtr, depoIdx     : CSR depo indices of each track (after SetDepos)
+    #   selfLength           : summed length of the track's own depos [cm]
+    #   quantities           : {name: column} of selfDepo / allDepo
+    #   selfDepo, allDepo    : (n, n_quantities) sums over the track's own depos,
+    #                          and over the track and all its descendants
+    #   provider             : called with the name of a quantity asked for but not
+    #                          added yet, so that it can be computed on demand
+
+    def __init__(self, trajectories, provider=None):
+        n = trajectories.size()
+        trkId = np.empty(n, dtype=np.int32)
+        parentId = np.empty(n, dtype=np.int32)
+        pdg = np.empty(n, dtype=np.int32)
+        momentum = np.empty((n, 4))
+        for i, traj in enumerate(trajectories):
+            mom = traj.GetInitialMomentum()
+            trkId[i] = traj.GetTrackId()
+            parentId[i] = traj.GetParentId()
+            pdg[i] = traj.GetPDGCode()
+            momentum[i] = (mom.X(), mom.Y(), mom.Z(), mom.E())
+        self.SetTracks(trkId, parentId, pdg, momentum, provider)
+
+    # ------------------------
+    @classmethod
+    def FromColumns(cls, trkId, parentId, pdg, momentum, provider=None):
+        # the same table from columns read elsewhere (e.g. a cache)
+        table = cls.__new__(cls)
+        table.SetTracks(np.array(trkId, dtype=np.int32), np.array(parentId, dtype=np.int32),
+                        np.array(pdg, dtype=np.int32), np.array(momentum, dtype=float), provider)
+        return table
+
+    # ------------------------
+    def SetTracks(self, trkId, parentId, pdg, momentum, provider):
+        n = trkId.size
+        self.size = n
+        self.trkId = trkId
+        self.parentId = parentId
+        self.pdg = pdg
+        self.momentum = momentum
+        p2 = np.sum(self.momentum[:, :3]**2, axis=1)
+        self.mass = np.sqrt(np.maximum(self.momentum[:, 3]**2 - p2, 0))
+        self.KE = self.momentum[:, 3] - self.mass
+
+        self.depth = GenerationDepth(self.parentId)
+        self.ancestor = NearestAncestor(self.parentId, self.parentId == -1)
+        self.primaryPdg = self.pdg[self.ancestor]
+        self.neutronAncestor = NearestAncestor(self.parentId, self.pdg == 2112)
+        self.childPtr, self.childIdx = GroupBy(self.parentId, n)
+
+        self.provider = provider
+        self.quantities = {}
+        self.selfDepo = np.zeros((n, 0))
+        self.allDepo = np.zeros((n, 0))
+        self.SetDepos(np.zeros(0, dtype=np.int32), np.zeros(n))
+        # with a provider, the depos and lengths are set when first needed
+        self.deposPending = provider is not None
+        self.lengthPending = provider is not None
+
+    # ------------------------
+    def SetDepos(self, depoTrkId, selfLength):
+        # depoTrkId: track id of each depo
+        self.depoPtr, self.depoIdx = GroupBy(depoTrkId, self.size)
+        self.deposPending = False
+        self.SetSelfLength(selfLength)
+
+    # ------------------------
+    def SetSelfLength(self, selfLength):
+        self._selfLength = selfLength
+        self.lengthPending = False
+
+    # ------------------------
+    def AddDepoSums(self, sums):
+        # sums: {name: (n,) per-track sums over the track's own depos}
+        # only the new columns are folded into the descendant sums, the ones
+        # already there are kept
+        keys = [key for key in sums if key not in self.quantities]
+        if not keys:
+            return
+        values = np.column_stack([sums[key] for key in keys]).reshape(self.size, len(keys))
+        for key in keys:
+            self.quantities[key] = len(self.quantities)
+        self.selfDepo = np.hstack((self.selfDepo, values))
+        self.allDepo = np.hstack((self.allDepo, SubtreeSums(values, self.parentId, self.depth)))
+
+    # ------------------------
+    def RequireDepos(self):
+        if self.deposPending:
+            self.provider('depoTotal')
+
+    @property
+    def selfLength(self):
+        if self.lengthPending:
+            self.provider('depoTotal')
+        return self._selfLength
+
+    # ------------------------
+    def Column(self, key):
+        if key not in self.quantities and self.provider is not None:
+            self.provider(key)
+        return self.quantities[key]
+
+    # ------------------------
+    def Children(self, i):
+        return self.childIdx[self.childPtr[i]:self.childPtr[i+1]]
+
+    # ------------------------
+    def Depos(self, i):
+        self.RequireDepos()
+        return self.depoIdx[self.depoPtr[i]:self.depoPtr[i+1]]
+
+    # ------------------------
+    def Depo(self, key):
+        # per-track sum of quantity key over the track's own depos
+        j = self.Column(key)
+        return self.selfDepo[:, j]
+
+    # ------------------------
+    def DepoWithDesendents(self, key):
+        # per-track sum of quantity key over the track and all its descendants
+        j = self.Column(key)
+        return self.allDepo[:, j]
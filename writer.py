@@ -1,8 +1,11 @@
-from event_first import Event
-import sys
+from event import Event
+import sys, os
+import argparse
+import multiprocessing
 import numpy as np
-from array import array
-from ROOT import TFile, TTree
+from schema import OutputDtype
+import ROOT
+from ROOT import TFile, TTree, TChain
 
 class Writer:
 
@@ -14,225 +17,273 @@ class Writer:
 
     def initOutputTree(self):
         self.T_out = TTree('Sim', 'Sim') # output tree
+        # one output record, each branch points to its field
+        self.row = np.zeros(1, dtype=OutputDtype(self.event.schema))
+        for obs in self.event.schema:
+            self.T_out.Branch(obs.name, self.row[obs.name], LeafList(obs))
 
-        self.Event_ID = array('i', [0]) #
-        self.T_out.Branch('Event_ID', self.Event_ID, 'Event_ID/I')
-
-        self.nu_pdg = array('i', [0]) #
-        self.T_out.Branch('nu_pdg', self.nu_pdg, 'nu_pdg/I')
-
-        self.nu_xs = array('f', [0])
-        self.T_out.Branch('nu_xs', self.nu_xs, 'nu_xs/F')
-
-        self.nu_proc = array('i', [0]) # genie process
-        self.T_out.Branch('nu_proc', self.nu_proc, 'nu_proc/I')
-
-        self.nu_nucl = array('i', [0]) # which nucleon
-        self.T_out.Branch('nu_nucl', self.nu_nucl, 'nu_nucl/I')
-
-        self.E_nu = array('f', [0]) # true neutrino energy
-        self.T_out.Branch('E_nu', self.E_nu, 'E_nu/F')
-
-        self.E_avail = array('f', [0]) # energy availabe from vertex interaction (excluding energy lost inside nuclei)
-        self.T_out.Branch('E_avail', self.E_avail, 'E_avail/F')
-
-        self.E_availList = np.zeros((8,), dtype=np.float32) # E avail for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('E_availList', self.E_availList, 'E_availList[8]/F')
-
-        self.E_depoTotal = array('f', [0]) # total energy deposit from all (charged) tracks
-        self.T_out.Branch('E_depoTotal', self.E_depoTotal, 'E_depoTotal/F')
-
-        self.E_depoList = np.zeros((8,), dtype=np.float32) # depo for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('E_depoList', self.E_depoList, 'E_depoList[8]/F')
-
-        self.E_depoTotal_track = array('f', [0]) # total energy deposit from long tracks
-        self.T_out.Branch('E_depoTotal_track', self.E_depoTotal_track, 'E_depoTotal_track/F')
-
-        self.E_depoList_track = np.zeros((8,), dtype=np.float32) # depo for long tracks: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('E_depoList_track', self.E_depoList_track, 'E_depoList_track[8]/F')
-
-        self.Q_depoTotal = array('f', [0]) # total charge deposit from all (charged) tracks
-        self.T_out.Branch('Q_depoTotal', self.Q_depoTotal, 'Q_depoTotal/F')
-
-        self.Q_depoList = np.zeros((8,), dtype=np.float32) # charge depo for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList', self.Q_depoList, 'Q_depoList[8]/F')
-
-        self.Q_depoTotal_th_75keV = array('f', [0]) # total charge deposit from all (charged) tracks with dQ cut of 75keV
-        self.T_out.Branch('Q_depoTotal_th_75keV', self.Q_depoTotal_th_75keV, 'Q_depoTotal_th_75keV/F')
-
-        self.Q_depoList_th_75keV = np.zeros((8,), dtype=np.float32) # charge depo with 75keV cut for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_th_75keV', self.Q_depoList_th_75keV, 'Q_depoList_th_75keV[8]/F')
-
-        self.Q_depoTotal_th_500keV = array('f', [0]) # total charge deposit from all (charged) tracks with dQ cut of 500keV
-        self.T_out.Branch('Q_depoTotal_th_500keV', self.Q_depoTotal_th_500keV, 'Q_depoTotal_th_500keV/F')
-
-        self.Q_depoList_th_500keV = np.zeros((8,), dtype=np.float32) # charge depo with 500keV cut for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_th_500keV', self.Q_depoList_th_500keV, 'Q_depoList_th_500keV[8]/F')
-
-        self.Q_depoTotal_MBox = array('f', [0]) # total charge deposit from all (charged) tracks Modified Box Model
-        self.T_out.Branch('Q_depoTotal_MBox', self.Q_depoTotal_MBox, 'Q_depoTotal_MBox/F')
-
-        self.Q_depoList_MBox = np.zeros((8,), dtype=np.float32) # charge depo for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_MBox', self.Q_depoList_MBox, 'Q_depoList_MBox[8]/F')
-
-        self.Q_depoTotal_MBox_th_75keV = array('f', [0]) # total charge deposit from all (charged) tracks with dQ cut of 75keV
-        self.T_out.Branch('Q_depoTotal_MBox_th_75keV', self.Q_depoTotal_MBox_th_75keV, 'Q_depoTotal_MBox_th_75keV/F')
-
-        self.Q_depoList_MBox_th_75keV = np.zeros((8,), dtype=np.float32) # charge depo with 75keV cut for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_MBox_th_75keV', self.Q_depoList_MBox_th_75keV, 'Q_depoList_MBox_th_75keV[8]/F')
-
-        self.Q_depoTotal_MBox_th_500keV = array('f', [0]) # total charge deposit from all (charged) tracks with dQ cut of 500keV
-        self.T_out.Branch('Q_depoTotal_MBox_th_500keV', self.Q_depoTotal_MBox_th_500keV, 'Q_depoTotal_MBox_th_500keV/F')
-
-        self.Q_depoList_MBox_th_500keV = np.zeros((8,), dtype=np.float32) # charge depo with 500keV cut for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_MBox_th_500keV', self.Q_depoList_MBox_th_500keV, 'Q_depoList_MBox_th_500keV[8]/F')
-
-        self.Q_depoTotal_dots_th_75keV = array('f', [0]) # total charge deposit from all short dots/blips with dQ cut of 75keV
-        self.T_out.Branch('Q_depoTotal_dots_th_75keV', self.Q_depoTotal_dots_th_75keV, 'Q_depoTotal_dots_th_75keV/F')
-
-        self.Q_depoList_dots_th_75keV = np.zeros((8,), dtype=np.float32) # charge depo with 75keV cut for short dots/blips from: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('Q_depoList_dots_th_75keV', self.Q_depoList_dots_th_75keV, 'Q_depoList_dots_th_75keV[8]/F')
-
-        self.L_depoTotal_avg_220PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 220PE/MeV
-        self.T_out.Branch('L_depoTotal_avg_220PEpMeV', self.L_depoTotal_avg_220PEpMeV, 'L_depoTotal_avg_220PEpMeV/F')
-
-        self.L_depoList_avg_220PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 220PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_avg_220PEpMeV', self.L_depoList_avg_220PEpMeV, 'L_depoList_avg_220PEpMeV[8]/F')
-
-        self.L_depoTotal_avg_180PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 180PE/MeV
-        self.T_out.Branch('L_depoTotal_avg_180PEpMeV', self.L_depoTotal_avg_180PEpMeV, 'L_depoTotal_avg_180PEpMeV/F')
-
-        self.L_depoList_avg_180PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 180PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_avg_180PEpMeV', self.L_depoList_avg_180PEpMeV, 'L_depoList_avg_180PEpMeV[8]/F')
-
-        self.L_depoTotal_avg_140PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 140PE/MeV
-        self.T_out.Branch('L_depoTotal_avg_140PEpMeV', self.L_depoTotal_avg_140PEpMeV, 'L_depoTotal_avg_140PEpMeV/F')
-
-        self.L_depoList_avg_140PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 140PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_avg_140PEpMeV', self.L_depoList_avg_140PEpMeV, 'L_depoList_avg_140PEpMeV[8]/F')
-
-        self.L_depoTotal_avg_100PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 100PE/MeV
-        self.T_out.Branch('L_depoTotal_avg_100PEpMeV', self.L_depoTotal_avg_100PEpMeV, 'L_depoTotal_avg_100PEpMeV/F')
-
-        self.L_depoList_avg_100PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 100PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_avg_100PEpMeV', self.L_depoList_avg_100PEpMeV, 'L_depoList_avg_100PEpMeV[8]/F')
-
-        self.L_depoTotal_avg_35PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 100PE/MeV
-        self.T_out.Branch('L_depoTotal_avg_35PEpMeV', self.L_depoTotal_avg_35PEpMeV, 'L_depoTotal_avg_35PEpMeV/F')
-
-        self.L_depoList_avg_35PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 35PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_avg_35PEpMeV', self.L_depoList_avg_35PEpMeV, 'L_depoList_avg_35PEpMeV[8]/F')
-
-        self.L_depoTotal_MBox_avg_220PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 220PE/MeV
-        self.T_out.Branch('L_depoTotal_MBox_avg_220PEpMeV', self.L_depoTotal_MBox_avg_220PEpMeV, 'L_depoTotal_MBox_avg_220PEpMeV/F')
-
-        self.L_depoList_MBox_avg_220PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 220PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_MBox_avg_220PEpMeV', self.L_depoList_MBox_avg_220PEpMeV, 'L_depoList_MBox_avg_220PEpMeV[8]/F')
-
-        self.L_depoTotal_MBox_avg_180PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 180PE/MeV
-        self.T_out.Branch('L_depoTotal_MBox_avg_180PEpMeV', self.L_depoTotal_MBox_avg_180PEpMeV, 'L_depoTotal_MBox_avg_180PEpMeV/F')
-
-        self.L_depoList_MBox_avg_180PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 180PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_MBox_avg_180PEpMeV', self.L_depoList_MBox_avg_180PEpMeV, 'L_depoList_MBox_avg_180PEpMeV[8]/F')
-
-        self.L_depoTotal_MBox_avg_140PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 140PE/MeV
-        self.T_out.Branch('L_depoTotal_MBox_avg_140PEpMeV', self.L_depoTotal_MBox_avg_140PEpMeV, 'L_depoTotal_MBox_avg_140PEpMeV/F')
-
-        self.L_depoList_MBox_avg_140PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 140PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_MBox_avg_140PEpMeV', self.L_depoList_MBox_avg_140PEpMeV, 'L_depoList_MBox_avg_140PEpMeV[8]/F')
-
-        self.L_depoTotal_MBox_avg_100PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 100PE/MeV
-        self.T_out.Branch('L_depoTotal_MBox_avg_100PEpMeV', self.L_depoTotal_MBox_avg_100PEpMeV, 'L_depoTotal_MBox_avg_100PEpMeV/F')
-
-        self.L_depoList_MBox_avg_100PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 100PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_MBox_avg_100PEpMeV', self.L_depoList_MBox_avg_100PEpMeV, 'L_depoList_MBox_avg_100PEpMeV[8]/F')
-
-        self.L_depoTotal_MBox_avg_35PEpMeV = array('f', [0]) # total light deposit from all (charged) tracks with mean light yield 100PE/MeV
-        self.T_out.Branch('L_depoTotal_MBox_avg_35PEpMeV', self.L_depoTotal_MBox_avg_35PEpMeV, 'L_depoTotal_MBox_avg_35PEpMeV/F')
-
-        self.L_depoList_MBox_avg_35PEpMeV = np.zeros((8,), dtype=np.float32) # light depo with mean LY 35PE/MeV for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('L_depoList_MBox_avg_35PEpMeV', self.L_depoList_MBox_avg_35PEpMeV, 'L_depoList_MBox_avg_35PEpMeV[8]/F')
-
-        self.N_parList = np.zeros((8,), dtype=np.int32) # number of particles for: lepton, proton, neutron, pi+-, pi0, gamma, alpha, others.
-        self.T_out.Branch('N_parList', self.N_parList, 'N_parList[8]/I')
-
-    def Write(self):
+    def Write(self, start=0, stop=None):
         # self.stat = {
         # }
         self.f_out.cd()
 
-        for i in range(self.event.nEntry):
+        if stop is None:
+            stop = self.event.nEntry
+        for i in range(start, stop):
         # for i in range(100):
             self.event.Jump(i)
 
             # proc = str(self.event.info['nu_proc']) + '-' + str(self.event.info['nu_nucl'])
             # v = self.stat.setdefault(proc, 0)
             # self.stat[proc] = v + 1
-            self.Event_ID[0] = self.event.info['Event_ID']
-            self.nu_pdg[0] = self.event.info['nu_pdg']
-            self.nu_xs[0] = self.event.info['nu_xs']
-            self.nu_proc[0] = self.event.info['nu_proc']
-            self.nu_nucl[0] = self.event.info['nu_nucl']
-            self.E_nu[0] = self.event.info['E_nu']
-
-            self.E_avail[0] = self.event.info['E_avail']
-            self.E_depoTotal[0] = self.event.info['E_depoTotal']
-            self.E_depoTotal_track[0] = self.event.info['E_depoTotal_track']
-            self.Q_depoTotal[0] = self.event.info['Q_depoTotal']
-            self.Q_depoTotal_th_75keV[0] = self.event.info['Q_depoTotal_th_75keV']
-            self.Q_depoTotal_th_500keV[0] = self.event.info['Q_depoTotal_th_500keV']
-            self.Q_depoTotal_dots_th_75keV[0] = self.event.info['Q_depoTotal_dots_th_75keV']
-            self.L_depoTotal_avg_220PEpMeV[0] = self.event.info['L_depoTotal_avg_220PEpMeV']
-            self.L_depoTotal_avg_180PEpMeV[0] = self.event.info['L_depoTotal_avg_180PEpMeV']
-            self.L_depoTotal_avg_140PEpMeV[0] = self.event.info['L_depoTotal_avg_140PEpMeV']
-            self.L_depoTotal_avg_100PEpMeV[0] = self.event.info['L_depoTotal_avg_100PEpMeV']
-            self.L_depoTotal_avg_35PEpMeV[0] = self.event.info['L_depoTotal_avg_35PEpMeV']
-
-            self.Q_depoTotal_MBox[0] = self.event.info['Q_depoTotal_MBox']
-            self.Q_depoTotal_MBox_th_75keV[0]  = self.event.info['Q_depoTotal_MBox_th_75keV']
-            self.Q_depoTotal_MBox_th_500keV[0] = self.event.info['Q_depoTotal_MBox_th_500keV']
-            self.L_depoTotal_MBox_avg_220PEpMeV[0] = self.event.info['L_depoTotal_MBox_avg_220PEpMeV']
-            self.L_depoTotal_MBox_avg_180PEpMeV[0] = self.event.info['L_depoTotal_MBox_avg_180PEpMeV']
-            self.L_depoTotal_MBox_avg_140PEpMeV[0] = self.event.info['L_depoTotal_MBox_avg_140PEpMeV']
-            self.L_depoTotal_MBox_avg_100PEpMeV[0] = self.event.info['L_depoTotal_MBox_avg_100PEpMeV']
-            self.L_depoTotal_MBox_avg_35PEpMeV[0]  = self.event.info['L_depoTotal_MBox_avg_35PEpMeV']
-
-            self.E_availList[:] = self.event.info['E_availList']
-            self.E_depoList[:] = self.event.info['E_depoList']
-            self.E_depoList_track[:] = self.event.info['E_depoList_track']
-            self.Q_depoList[:] = self.event.info['Q_depoList']
-            self.Q_depoList_th_75keV[:] = self.event.info['Q_depoList_th_75keV']
-            self.Q_depoList_th_500keV[:] = self.event.info['Q_depoList_th_500keV']
-            self.Q_depoList_dots_th_75keV[:] = self.event.info['Q_depoList_dots_th_75keV']
-            self.L_depoList_avg_220PEpMeV[:] = self.event.info['L_depoList_avg_220PEpMeV']
-            self.L_depoList_avg_180PEpMeV[:] = self.event.info['L_depoList_avg_180PEpMeV']
-            self.L_depoList_avg_140PEpMeV[:] = self.event.info['L_depoList_avg_140PEpMeV']
-            self.L_depoList_avg_100PEpMeV[:] = self.event.info['L_depoList_avg_100PEpMeV']
-            self.L_depoList_avg_35PEpMeV[:] = self.event.info['L_depoList_avg_35PEpMeV']
-
-            self.Q_depoList_MBox[:] = self.event.info['Q_depoList_MBox']
-            self.Q_depoList_MBox_th_75keV[:] = self.event.info['Q_depoList_MBox_th_75keV']
-            self.Q_depoList_MBox_th_500keV[:] = self.event.info['Q_depoList_MBox_th_500keV']
-            self.L_depoList_MBox_avg_220PEpMeV[:] = self.event.info['L_depoList_MBox_avg_220PEpMeV']
-            self.L_depoList_MBox_avg_180PEpMeV[:] = self.event.info['L_depoList_MBox_avg_180PEpMeV']
-            self.L_depoList_MBox_avg_140PEpMeV[:] = self.event.info['L_depoList_MBox_avg_140PEpMeV']
-            self.L_depoList_MBox_avg_100PEpMeV[:] = self.event.info['L_depoList_MBox_avg_100PEpMeV']
-            self.L_depoList_MBox_avg_35PEpMeV[:] = self.event.info['L_depoList_MBox_avg_35PEpMeV']
-
-            self.N_parList[:] = self.event.info['N_parList']
-
-            self.N_parList[2] = self.event.info['N_parList'][2]
-
-        self.T_out.Fill()
+            # all fields at once, field by field in schema order
+            self.row[0] = self.event.info
+
+            self.event.Timed('Fill', self.T_out.Fill)
 
         self.T_out.Write()
         # print(self.stat)
 
+    def Close(self):
+        self.f_out.Close()
+
+# ------------------------
+def LeafList(obs):
+    # e.g. 'E_availList[8]/F'
+    return obs.name + ''.join(f'[{n}]' for n in obs.shape) + ('/I' if obs.dtype == 'i4' else '/F')
+
+# copies nRows contiguous output records one at a time into the record the
+# branches of a TTree point to and fills it, so a whole chunk is written
+# without going through python
+_fillRowsCode = r'''
+#include <cstring>
+namespace pyedep {
+void FillRows(TTree* tree, Long64_t nRows, ULong64_t src, ULong64_t dst, ULong64_t rowBytes) {
+    for (Long64_t row = 0; row < nRows; ++row) {
+        std::memcpy(reinterpret_cast<void*>(dst), reinterpret_cast<const char*>(src) + row*rowBytes, rowBytes);
+        tree->Fill();
+    }
+}
+}
+'''
+
+_fillRowsReady = None
+
+# ------------------------
+def HasFillRows():
+    # compile FillRows once per process; fall back to python if cling can't
+    global _fillRowsReady
+    if _fillRowsReady is None:
+        _fillRowsReady = bool(ROOT.gInterpreter.Declare(_fillRowsCode))
+        if not _fillRowsReady:
+            print("writer: could not compile the FillRows helper, filling the Sim tree in python")
+    return _fillRowsReady
+
+class ColumnWriter:
+    # Buffered columnar output backend.
+    # Per-event info is copied into a preallocated buffer of output records,
+    # flushed every chunkSize events to ROOT (.root, same Sim tree and branches
+    # as Writer), Parquet (.parquet, needs pyarrow) or HDF5 (.h5/.hdf5, needs h5py).
+
+    def __init__(self, event, outfile='output.root', chunkSize=10000):
+        self.event = event
+        self.outfile = outfile
+        self.chunkSize = chunkSize
+        ext = os.path.splitext(outfile)[1].lower()
+        formats = {'.root': 'root', '.parquet': 'parquet', '.h5': 'hdf5', '.hdf5': 'hdf5'}
+        if ext not in formats:
+            print(f"Unknown output format: {ext}")
+            sys.exit(1)
+        self.format = formats[ext]
+        self.buffer = np.zeros(chunkSize, dtype=OutputDtype(event.schema))
+        self.nRows = 0
+        self.sink = None
+
+    # ------------------------
+    def Append(self, info):
+        # info: one record, or (n,) records
+        records = np.atleast_1d(info)
+        while records.size:
+            n = min(records.size, self.chunkSize - self.nRows)
+            self.buffer[self.nRows:self.nRows+n] = records[:n]
+            self.nRows += n
+            records = records[n:]
+            if self.nRows == self.chunkSize:
+                self.Flush()
+
+    # ------------------------
+    def Write(self, start=0, stop=None):
+        # the next batch is read in the background while this one is processed
+        for batch in self.event.iter(start, stop, batch_size=100):
+            self.Append(batch.info)
+        self.Flush()
+
+    # ------------------------
+    def Flush(self):
+        if self.nRows == 0:
+            return
+        chunk = self.buffer[:self.nRows]
+        if self.format == 'root':
+            self.event.Timed('Fill', self.FlushROOT, chunk)
+        elif self.format == 'parquet':
+            self.event.Timed('Fill', self.FlushParquet, chunk)
+        else:
+            self.event.Timed('Fill', self.FlushHDF5, chunk)
+        self.nRows = 0
+
+    # ------------------------
+    def FlushROOT(self, chunk):
+        if self.sink is None:
+            self.f_out = TFile(self.outfile, 'RECREATE')
+            self.T_out = TTree('Sim', 'Sim') # output tree
+            self.row = np.zeros(1, dtype=self.buffer.dtype)
+            for obs in self.event.schema:
+                self.T_out.Branch(obs.name, self.row[obs.name], LeafList(obs))
+            self.sink = self.T_out
+
+        if HasFillRows():
+            ROOT.pyedep.FillRows(self.T_out, len(chunk), chunk.ctypes.data, self.row.ctypes.data, self.row.itemsize)
+            return
+        for record in chunk:
+            self.row[0] = record
+            self.T_out.Fill()
+
+    # ------------------------
+    def FlushParquet(self, chunk):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("pyarrow is needed for Parquet output")
+            sys.exit(1)
+        arrays = []
+        for name in chunk.dtype.names:
+            column = np.ascontiguousarray(chunk[name])
+            # *List and *_scan fields as (nested) fixed size lists
+            array = pa.array(column.reshape(-1))
+            for size in reversed(column.shape[1:]):
+                array = pa.FixedSizeListArray.from_arrays(array, size)
+            arrays.append(array)
+        table = pa.Table.from_arrays(arrays, names=list(chunk.dtype.names))
+        if self.sink is None:
+            self.sink = pq.ParquetWriter(self.outfile, table.schema)
+        self.sink.write_table(table)
+
+    # ------------------------
+    def FlushHDF5(self, chunk):
+        try:
+            import h5py
+        except ImportError:
+            print("h5py is needed for HDF5 output")
+            sys.exit(1)
+        if self.sink is None:
+            self.sink = h5py.File(self.outfile, 'w')
+            group = self.sink.create_group('Sim')
+            for obs in self.event.schema:
+                group.create_dataset(obs.name, shape=(0,) + obs.shape, maxshape=(None,) + obs.shape,
+                                     dtype=obs.dtype, chunks=(self.chunkSize,) + obs.shape)
+        group = self.sink['Sim']
+        for name in chunk.dtype.names:
+            n = group[name].shape[0]
+            group[name].resize(n + len(chunk), axis=0)
+            group[name][n:] = chunk[name]
+
+    # ------------------------
+    def Close(self):
+        self.Flush()
+        if self.sink is None:
+            return
+        if self.format == 'root':
+            self.f_out.cd()
+            self.T_out.Write()
+            self.f_out.Close()
+        else:
+            self.sink.close()
+
+# ------------------------
+def MakeWriter(event, outfile, buffered=False):
+    # Parquet/HDF5 output always goes through the buffered backend
+    if buffered or not outfile.lower().endswith('.root'):
+        return ColumnWriter(event, outfile)
+    return Writer(event, outfile)
+
+# ------------------------
+def WriteRange(task):
+    # one worker: entries [start, stop) of the chain into its own Sim tree shard
+    fileName, evgen, outfile, start, stop, buffered, options = task
+    ROOT.gROOT.SetBatch(True)
+    event = Event(fileName, evgen, **options)
+    w = MakeWriter(event, outfile, buffered)
+    w.Write(start, stop)
+    w.Close()
+    if event.profiler is not None:
+        event.EndProfiledEvent()
+    return outfile, event.profiler
+
+# ------------------------
+def WriteParallel(fileName, evgen, outfile, jobs, buffered=False, cacheDir=None, scanThresholds=None, scanLengthCuts=None,
+                  profileFile=None):
+    # split the chain into contiguous entry ranges, one shard per range, and
+    # merge the shards back in entry order so Event_ID stays sorted
+    chain = TChain("EDepSimEvents")
+    chain.Add(fileName)
+    nEntry = chain.GetEntries()
+    bounds = np.linspace(0, nEntry, jobs+1).astype(int)
+    base, ext = os.path.splitext(outfile)
+    # Event options of the workers
+    options = {'cacheDir': cacheDir, 'scanThresholds': scanThresholds, 'scanLengthCuts': scanLengthCuts,
+               'profile': profileFile is not None}
+    tasks = [(fileName, evgen, f'{base}_part{i}{ext}', bounds[i], bounds[i+1], buffered, options)
+             for i in range(jobs) if i == 0 or bounds[i] < bounds[i+1]]
+
+    # spawn: every worker starts its own ROOT instead of inheriting a forked one
+    with multiprocessing.get_context('spawn').Pool(len(tasks)) as pool:
+        shards, profilers = zip(*pool.map(WriteRange, tasks))
+    if profileFile is not None:
+        # one report for all the workers
+        profiler = profilers[0]
+        for other in profilers[1:]:
+            profiler.Merge(other)
+        profiler.Save(profileFile)
+
+    merger = ROOT.TFileMerger(False)
+    merger.OutputFile(outfile, 'RECREATE')
+    for shard in shards:
+        merger.AddFile(shard)
+    if not merger.Merge():
+        print(f"Failed to merge {len(shards)} shards into {outfile}, shards kept")
+        sys.exit(1)
+    for shard in shards:
+        os.remove(shard)
+
 if __name__ == "__main__":
-    if (len(sys.argv)>3):
-        outfile = sys.argv[3]
+    parser = argparse.ArgumentParser(description='Summarize edep-sim files into the Sim tree')
+    parser.add_argument('input', help='input edep-sim file(s), wildcards allowed')
+    parser.add_argument('evgen', choices=['Genie', 'Marley'], help='event generator')
+    parser.add_argument('output', nargs='?', default='output.root', help='output file')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--buffered', action='store_true',
+                        help='write ROOT output in chunks from column buffers (always on for .parquet/.h5)')
+    parser.add_argument('--cache', metavar='DIR', default=None,
+                        help='cache the derived per-event quantities in DIR and reuse them on later runs')
+    parser.add_argument('--scan-thresholds', metavar='MeV', type=float, nargs='+', default=None,
+                        help='dQ thresholds of the Q_depoList*_scan branches')
+    parser.add_argument('--scan-length-cuts', metavar='cm', type=float, nargs='+', default=None,
+                        help='track/blip length cuts of the E_depoList_track_scan and Q_depoList_dots_scan branches')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help='time each processing stage and write the report to FILE (.json or .csv)')
+    args = parser.parse_args()
+    options = {'cacheDir': args.cache, 'scanThresholds': args.scan_thresholds, 'scanLengthCuts': args.scan_length_cuts}
+
+    if args.jobs > 1:
+        if not args.output.lower().endswith('.root'):
+            print("--jobs is only supported for ROOT output")
+            sys.exit(1)
+        WriteParallel(args.input, args.evgen, args.output, args.jobs, args.buffered, profileFile=args.profile, **options)
     else:
-        outfile = 'output.root'
-    event = Event(sys.argv[1], sys.argv[2])
-    w = Writer(event, outfile)
-    w.Write()
+        event = Event(args.input, args.evgen, profile=args.profile is not None, **options)
+        w = MakeWriter(event, args.output, args.buffered)
+        w.Write()
+        w.Close()
+        if args.profile is not None:
+            event.SaveProfile(args.profile)